@@ -0,0 +1,78 @@
+"""
+Compare JSON codecs on a large `operations` response and a request with a long `in` predicate.
+
+    $ python -m benchmarks.codec
+"""
+import gc
+import time
+
+from conseil.codec import JsonCodec, OrjsonCodec, UjsonCodec, orjson, ujson
+
+
+def b58(value, size):
+    alphabet = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+    res = ''
+    for _ in range(size):
+        value, i = divmod(value * 7919 + 13, 58)
+        res += alphabet[i]
+    return res
+
+
+def operations(rows_count):
+    return [
+        {
+            'operation_group_hash': 'oo' + b58(i, 49),
+            'kind': 'transaction',
+            'source': 'tz1' + b58(i, 33),
+            'destination': 'KT1' + b58(i + 1, 33),
+            'amount': i * 1000,
+            'fee': 1420,
+            'gas_limit': 10307,
+            'storage_limit': 0,
+            'consumed_gas': 10207.5,
+            'block_level': i // 100,
+            'timestamp': 1554076800000 + i * 60000,
+            'status': 'applied',
+            'parameters': None,
+        }
+        for i in range(rows_count)
+    ]
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows_count=200000, keys_count=50000, repeat=3):
+    body = JsonCodec().dumps(operations(rows_count))
+    payload = {
+        'fields': [],
+        'predicates': [{'field': 'source', 'operation': 'in', 'set': ['tz1' + b58(i, 33) for i in range(keys_count)]}],
+        'orderBy': [],
+        'limit': None,
+        'output': 'json',
+    }
+    print(f'response: {rows_count} rows, {len(body) / 2 ** 20:.1f} MiB')
+
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.extend([OrjsonCodec(), OrjsonCodec(exact=False)])
+    if ujson is not None:
+        codecs.extend([UjsonCodec(), UjsonCodec(exact=False)])
+
+    for codec in codecs:
+        decode = measure(lambda: codec.loads(body), repeat)
+        encode = measure(lambda: codec.dumps(payload), repeat)
+        name = codec.name if getattr(codec, 'exact', True) else f'{codec.name} (inexact)'
+        print(f'{name:>18}: decode {len(body) / 2 ** 20 / decode:.0f} MiB/s, '
+              f'encode {keys_count} keys {encode * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
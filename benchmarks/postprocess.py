@@ -0,0 +1,59 @@
+"""
+Compare postprocessing throughput (labels and dropped columns) of the generic rules and the compiled projection.
+
+    $ python -m benchmarks.postprocess
+"""
+import gc
+import time
+
+from conseil.query import projection
+
+
+def generic(data, field_map):
+    # Postprocessing before rules were compiled
+    def process(item):
+        return {
+            field_map.get(k, k): v
+            for k, v in item.items()
+            if field_map.get(k) is not False
+        }
+
+    return list(map(process, data))
+
+
+def compiled(data, field_map):
+    return list(map(projection(list(data[0]), field_map), data))
+
+
+def measure(func, data, field_map, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(data, field_map)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows_count=1000000, repeat=3):
+    data = [
+        {
+            'operation_group_hash': f'oo{i:050}',
+            'kind': 'transaction',
+            'source': f'tz1{i:033}',
+            'amount': i * 1000,
+            'fee': 1420,
+            'block_level': i // 100,
+            'timestamp': 1554076800000 + i * 60000,
+        }
+        for i in range(rows_count)
+    ]
+    field_map = {'operation_group_hash': 'hash', 'block_level': 'level', 'kind': False}
+
+    for name, func in [('generic', generic), ('compiled', compiled)]:
+        elapsed = measure(func, data, field_map, repeat)
+        print(f'{name:>8}: {rows_count / elapsed:,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare request latency with and without connection pooling against a local stub server.
+
+    $ python -m benchmarks.transport
+"""
+import time
+import statistics
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Thread
+
+from conseil.api import ConseilApi, Transport, PooledTransport
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    # `http.server.ThreadingHTTPServer` requires Python 3.7
+    daemon_threads = True
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(api, requests_count):
+    latencies = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        api.post('data/tezos/mainnet/operations', {'fields': [], 'predicates': []})
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'mean': statistics.mean(latencies),
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99) - 1]
+    }
+
+
+def main(requests_count=1000):
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    host = f'http://127.0.0.1:{server.server_address[1]}'
+
+    try:
+        for name, transport in [('plain', Transport()), ('pooled', PooledTransport())]:
+            api = ConseilApi('key', host, 2, transport=transport)
+            stats = measure(api, requests_count)
+            api.close()
+            print(f'{name:>8}: ' + ', '.join(f'{k}={v * 1000:.3f}ms' for k, v in stats.items()))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
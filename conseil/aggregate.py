@@ -0,0 +1,150 @@
+from functools import cmp_to_key
+
+from conseil.api import ConseilException
+
+
+def compare_values(a, b):
+    # Nulls go last in ascending order (like PostgreSQL does)
+    if a is None or b is None:
+        return (a is None) - (b is None)
+    return (a > b) - (a < b)
+
+
+def sort_key(order_by: list):
+    """
+    Build a sort key function for Conseil sort rules
+    :param order_by: list of {'field': ..., 'direction': 'asc'|'desc'}
+    :return: key function to be used with sorted/heapq.merge
+    """
+    def compare(x, y):
+        for rule in order_by:
+            res = compare_values(x.get(rule['field']), y.get(rule['field']))
+            if res:
+                return -res if rule['direction'] == 'desc' else res
+        return 0
+
+    return cmp_to_key(compare)
+
+
+def evaluate(predicate: dict, value) -> bool:
+    """
+    Check value against Conseil predicate on the client side
+    :param predicate: predicate object
+    :param value: field value
+    :return: bool
+    """
+    operation, args = predicate['operation'], predicate['set']
+    if operation == 'isnull':
+        res = value is None
+    elif value is None:
+        res = False
+    elif operation == 'eq':
+        res = value == args[0]
+    elif operation == 'in':
+        res = value in args
+    elif operation == 'between':
+        res = args[0] <= value <= args[1]
+    elif operation == 'lt':
+        res = value < args[0]
+    elif operation == 'gt':
+        res = value > args[0]
+    elif operation == 'like':
+        res = str(args[0]) in str(value)
+    elif operation == 'startsWith':
+        res = str(value).startswith(str(args[0]))
+    elif operation == 'endsWith':
+        res = str(value).endswith(str(args[0]))
+    else:
+        raise NotImplementedError(operation)
+    return res != predicate.get('inverse', False)
+
+
+def column(aggregation: dict):
+    return f'{aggregation["function"]}_{aggregation["field"]}'
+
+
+def _sum(values):
+    values = [x for x in values if x is not None]
+    return sum(values) if values else None
+
+
+def _min(values):
+    values = [x for x in values if x is not None]
+    return min(values) if values else None
+
+
+def _max(values):
+    values = [x for x in values if x is not None]
+    return max(values) if values else None
+
+
+MERGE_FUNCTIONS = {
+    'sum': _sum,
+    'count': lambda values: sum(x or 0 for x in values),
+    'min': _min,
+    'max': _max
+}
+
+
+def partial_payload(payload: dict) -> dict:
+    """
+    Rewrite aggregated query so that results of its partitions can be merged:
+    `avg` is replaced by `sum` and `count`, HAVING, sorting and limit are applied after merging
+    :param payload: Conseil query
+    :return: Conseil query
+    """
+    aggregation = []
+    for item in payload['aggregation']:
+        if item['function'] == 'avg':
+            parts = [{'field': item['field'], 'function': x} for x in ['sum', 'count']]
+        else:
+            parts = [{'field': item['field'], 'function': item['function']}]
+        aggregation.extend(x for x in parts if x not in aggregation)
+
+    return {
+        **payload,
+        'aggregation': aggregation,
+        'orderBy': [],
+        'limit': None
+    }
+
+
+def merge_aggregated(results: list, payload: dict) -> list:
+    """
+    Merge aggregated results of several partitions, see `partial_payload`
+    :param results: list of lists of rows
+    :param payload: original Conseil query
+    :return: list
+    """
+    fields = payload['fields']
+    partial = partial_payload(payload)['aggregation']
+
+    groups = {}
+    for row in (row for res in results for row in res):
+        groups.setdefault(tuple(row.get(x) for x in fields), []).append(row)
+
+    data = []
+    for key, rows in groups.items():
+        merged = {column(x): MERGE_FUNCTIONS[x['function']]([row.get(column(x)) for row in rows]) for x in partial}
+        item = dict(zip(fields, key))
+        for aggregation in payload['aggregation']:
+            if aggregation['function'] == 'avg':
+                total = merged[f'sum_{aggregation["field"]}']
+                count = merged[f'count_{aggregation["field"]}']
+                value = total / count if count else None
+            else:
+                value = merged[column(aggregation)]
+            item[column(aggregation)] = value
+
+        having = [x['predicate'] for x in payload['aggregation'] if x.get('predicate')]
+        try:
+            if all(evaluate(x, item[x['field']]) for x in having):
+                data.append(item)
+        except KeyError as e:
+            raise ConseilException(f'Orphan HAVING predicate on `{e.args[0]}`')
+
+    if payload['orderBy']:
+        data.sort(key=sort_key(payload['orderBy']))
+    if payload['limit'] is not None:
+        data = data[:payload['limit']]
+    return data
@@ -1,17 +1,89 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from weakref import WeakKeyDictionary
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from conseil.codec import JsonCodec, default_codec
+from conseil.retry import RateLimiter, RetryPolicy
 
 
 class ConseilException(Exception):
-    pass
+
+    def __init__(self, *args, status_code=None):
+        super(ConseilException, self).__init__(*args)
+        self.status_code = status_code
+
+
+class Transport:
+    """
+    Plain HTTP transport, opens a new connection for every request
+    """
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method=method, url=url, **kwargs)
+
+    def close(self):
+        pass
+
+
+class PooledTransport(Transport):
+    """
+    Thread-safe HTTP transport keeping a pool of long-lived connections per host
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        """
+        :param pool_connections: number of per-host pools to keep
+        :param pool_maxsize: maximum number of connections kept alive per host
+        :param pool_block: block when all connections to a host are busy instead of opening extra ones
+        :param keep_alive: reuse connections between requests
+        """
+        self.keep_alive = keep_alive
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # Sessions are not thread-safe, but the adapter (and its connection pools) is,
+        # so every thread gets its own session sharing a single adapter
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        if not self.keep_alive:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Connection': 'close'}
+        return self.session.request(method=method, url=url, **kwargs)
+
+    def close(self):
+        self._adapter.close()
 
 
 class ConseilApi:
 
-    def __init__(self, api_key, api_host, api_version, timeout=15):
+    def __init__(self, api_key, api_host, api_version, timeout=15, transport=None, codec: JsonCodec = None,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None):
         self._api_key = api_key
         self.host = api_host
         self.version = api_version
         self.timeout = timeout
+        self.transport = transport or PooledTransport()
+        self.codec = codec or default_codec()
+        self.retry = retry
+        self.rate_limiter = rate_limiter
 
     def __repr__(self):
         res = [
@@ -21,21 +93,115 @@ class ConseilApi:
         ]
         return '\n'.join(res)
 
-    def _request(self, method, path, json=None):
-        response = requests.request(
-            method=method,
-            url=f'{self.host}/v{self.version}/{path}',
-            headers={'apiKey': self._api_key},
-            json=json,
-            timeout=self.timeout
-        )
-        if response.status_code != 200:
-            raise ConseilException(f'[{response.status_code}]: {response.text}')
+    def _request(self, method, path, json=None, stream=False):
+        headers = {'apiKey': self._api_key}
+        if json is not None:
+            # Not using `requests` serialization which is not able to encode Decimal values
+            headers['Content-Type'] = 'application/json'
+            json = self.codec.dumps(json)
 
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.transport.request(
+                    method=method,
+                    url=f'{self.host}/v{self.version}/{path}',
+                    headers=headers,
+                    data=json,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+            except Exception as e:
+                if self.retry is None or not self.retry.should_retry(method, attempt, error=e):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 200:
+                break
+            if self.retry is None or not self.retry.should_retry(method, attempt, response=response):
+                raise ConseilException(f'[{response.status_code}]: {response.text}', status_code=response.status_code)
+
+            delay = self.retry.delay(attempt, response)
+            if response.status_code == 429 and self.rate_limiter is not None:
+                # Slow down all threads sharing the limiter, not only this one
+                self.rate_limiter.pause(delay)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+        if not stream:
+            response.json = partial(self._decode, response)
         return response
 
+    def _decode(self, response, **kwargs):
+        return self.codec.loads(response.content, **kwargs)
+
     def get(self, path):
         return self._request(method='GET', path=path)
 
-    def post(self, path, json):
-        return self._request(method='POST', path=path, json=json)
+    def post(self, path, json, stream=False):
+        return self._request(method='POST', path=path, json=json, stream=stream)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncConseilApi(ConseilApi):
+    """
+    Conseil API usable from asyncio code, limits the number of requests in flight
+    """
+
+    def __init__(self, api_key, api_host, api_version, timeout=15, transport=None, concurrency=10,
+                 codec: JsonCodec = None, retry: RetryPolicy = None, rate_limiter: RateLimiter = None):
+        transport = transport or PooledTransport(pool_maxsize=concurrency)
+        super(AsyncConseilApi, self).__init__(api_key, api_host, api_version, timeout, transport, codec,
+                                              retry, rate_limiter)
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphores = WeakKeyDictionary()
+        # Blocking calls made from other threads (e.g. chunks of a split query) obey the same limit
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def _semaphore(self, loop):
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def _request_async(self, method, path, json=None):
+        # Blocking requests are offloaded to a dedicated pool sharing the pooled transport,
+        # the semaphore keeps excess coroutines waiting on the loop instead of in the pool queue
+        loop = asyncio.get_event_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(
+                self._executor,
+                partial(self._request, method=method, path=path, json=json)
+            )
+
+    def _request(self, method, path, json=None, stream=False):
+        with self._slots:
+            return super(AsyncConseilApi, self)._request(method, path, json=json, stream=stream)
+
+    async def run_async(self, func, *args):
+        """
+        Run blocking function making requests (e.g. a chunked query) on the request pool
+        :param func: callable
+        :param args: function arguments
+        :return: function result
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def get_async(self, path):
+        return await self._request_async(method='GET', path=path)
+
+    async def post_async(self, path, json):
+        return await self._request_async(method='POST', path=path, json=json)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        super(AsyncConseilApi, self).close()
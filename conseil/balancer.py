@@ -0,0 +1,194 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from conseil.api import ConseilApi, ConseilException, PooledTransport
+from conseil.codec import JsonCodec
+from conseil.retry import RateLimiter, RetryPolicy
+
+
+class Endpoint:
+    """
+    Conseil replica and its health statistics
+    """
+
+    def __init__(self, api: ConseilApi):
+        self.api = api
+        self.latency = None
+        self.inflight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def score(self):
+        # Unknown replicas are probed first, busy ones are penalized
+        return (self.latency or 0.0) * (self.inflight + 1)
+
+
+def is_failure(error) -> bool:
+    """
+    Check if the error is caused by the host rather than by the query
+    :param error: raised exception
+    :return: bool
+    """
+    if not isinstance(error, ConseilException):
+        return True
+    return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+
+
+def _discard(future):
+    # Release the connection taken by the slower of hedged requests
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class BalancedConseilApi:
+    """
+    Spreads requests across several Conseil replicas, can be used instead of `ConseilApi`
+    """
+
+    def __init__(self, api_key, api_hosts: list, api_version, timeout=15, transport=None, codec: JsonCodec = None,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None, hedge_after=None,
+                 max_failures=3, eject_for=30.0, alpha=0.2, max_workers=16):
+        """
+        :param api_hosts: replica urls, the first one is used to key caches
+        :param hedge_after: send a duplicate request to another replica if there is no response after
+        this number of seconds, the first reply wins; None disables hedging
+        :param max_failures: eject a replica after this number of consecutive failures
+        :param eject_for: seconds to wait before sending requests to an ejected replica again
+        :param alpha: EWMA smoothing factor for replica latency
+        :param max_workers: number of threads for hedged requests
+        """
+        if not api_hosts:
+            raise ConseilException('At least one host is required')
+
+        transport = transport or PooledTransport()
+        self.endpoints = [
+            Endpoint(ConseilApi(api_key, host, api_version, timeout, transport, codec, retry, rate_limiter))
+            for host in api_hosts
+        ]
+        self.host = api_hosts[0]
+        self.version = api_version
+        self.transport = transport
+        self.codec = self.endpoints[0].api.codec
+        self.hedge_after = hedge_after
+        self.max_failures = max_failures
+        self.eject_for = eject_for
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if hedge_after is not None else None
+
+    def __repr__(self):
+        res = [
+            super(BalancedConseilApi, self).__repr__(),
+            '\nProviders',
+            *[f'{x.api.host} (v{self.version})' for x in self.endpoints]
+        ]
+        return '\n'.join(res)
+
+    def stats(self) -> list:
+        """
+        Get replicas health
+        :return: list of dicts
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'host': x.api.host,
+                    'latency': x.latency,
+                    'inflight': x.inflight,
+                    'failures': x.failures,
+                    'ejected': x.ejected_until > now
+                }
+                for x in self.endpoints
+            ]
+
+    def _pick(self, exclude=()):
+        now = time.monotonic()
+        with self._lock:
+            candidates = [x for x in self.endpoints if x not in exclude]
+            # If every replica is ejected, keep trying them rather than failing without a request
+            healthy = [x for x in candidates if x.ejected_until <= now] or candidates
+            if not healthy:
+                return None
+            # Power of two random choices avoids sending all requests to the same fastest replica
+            sample = random.sample(healthy, 2) if len(healthy) > 2 else healthy
+            endpoint = min(sample, key=Endpoint.score)
+            endpoint.inflight += 1
+            return endpoint
+
+    def _release(self, endpoint, latency=None, error=None):
+        with self._lock:
+            endpoint.inflight -= 1
+            if error is None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.alpha * (latency - endpoint.latency)
+                endpoint.failures = 0
+                endpoint.ejected_until = 0.0
+            elif is_failure(error):
+                endpoint.failures += 1
+                if endpoint.failures >= self.max_failures:
+                    endpoint.ejected_until = time.monotonic() + self.eject_for
+
+    def _call(self, endpoint, method, path, **kwargs):
+        start = time.monotonic()
+        try:
+            response = endpoint.api._request(method, path, **kwargs)
+        except Exception as e:
+            self._release(endpoint, error=e)
+            raise
+        self._release(endpoint, latency=time.monotonic() - start)
+        return response
+
+    def _hedged(self, endpoint, tried, method, path, **kwargs):
+        primary = self._executor.submit(self._call, endpoint, method, path, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        backup_endpoint = None if done else self._pick(exclude=tried)
+        if backup_endpoint is None:
+            return primary.result()
+
+        tried.append(backup_endpoint)
+        futures = [primary, self._executor.submit(self._call, backup_endpoint, method, path, **kwargs)]
+        error = None
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            for other in futures:
+                if other is not future:
+                    other.add_done_callback(_discard)
+            return response
+        raise error
+
+    def _request(self, method, path, json=None, stream=False):
+        tried, error = [], None
+        while True:
+            endpoint = self._pick(exclude=tried)
+            if endpoint is None:
+                raise error
+            tried.append(endpoint)
+            try:
+                if self._executor is None:
+                    return self._call(endpoint, method, path, json=json, stream=stream)
+                return self._hedged(endpoint, tried, method, path, json=json, stream=stream)
+            except Exception as e:
+                # Query errors would be the same on any replica, host failures are retried on the next one
+                if not is_failure(e):
+                    raise
+                error = e
+
+    def get(self, path):
+        return self._request(method='GET', path=path)
+
+    def post(self, path, json, stream=False):
+        return self._request(method='POST', path=path, json=json, stream=stream)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.transport.close()
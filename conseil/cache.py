@@ -0,0 +1,295 @@
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from conseil.normalize import payload_hash
+from conseil.stream import slice_json_array
+
+
+def cache_key(url: str, payload: dict) -> str:
+    """
+    Stable key for a Conseil query, equal for logically identical queries
+    :param url: full request url (including host and api version)
+    :param payload: Conseil query
+    :return: hex digest
+    """
+    body = f'{url}\n{payload_hash(payload)}'
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Base class for query result caches
+    """
+
+    def get(self, url: str, payload: dict):
+        """
+        Get cached result
+        :param url: full request url
+        :param payload: Conseil query
+        :return: cached response body or None
+        """
+        raise NotImplementedError
+
+    def set(self, url: str, payload: dict, data: str):
+        """
+        Store query result
+        :param url: full request url
+        :param payload: Conseil query
+        :param data: response body (JSON or CSV text), decoded on the way out
+        """
+        raise NotImplementedError
+
+
+class DiskCache(ResultCache):
+    """
+    Size-bounded LRU cache stored in a SQLite database, can be shared by several processes
+    """
+
+    def __init__(self, filename, max_size=256 * 1024 * 1024, ttl=None, entity_ttl: dict = None):
+        """
+        :param filename: path to the database file
+        :param max_size: max total size of cached (compressed) results in bytes
+        :param ttl: default time to live in seconds, None means forever
+        :param entity_ttl: time to live overrides per entity, e.g. {'blocks': 60}
+        """
+        self.filename = filename
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entity_ttl = entity_ttl or dict()
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL,
+                    accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared between threads nor inherited by forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.filename, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _ttl(self, url):
+        entity = url.rstrip('/').rsplit('/', 1)[-1]
+        return self.entity_ttl.get(entity, self.ttl)
+
+    def get(self, url: str, payload: dict):
+        key = cache_key(url, payload)
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute('SELECT data, expires FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < now:
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        return zlib.decompress(row[0]).decode()
+
+    def set(self, url: str, payload: dict, data: str):
+        ttl = self._ttl(url)
+        if ttl == 0:
+            return
+
+        blob = zlib.compress(data.encode())
+        if len(blob) > self.max_size:
+            return
+
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, data, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                (cache_key(url, payload), blob, len(blob), None if ttl is None else now + ttl, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        stale = []
+        for key, size in conn.execute('SELECT key, size FROM results ORDER BY accessed').fetchall():
+            if total <= self.max_size:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM results WHERE key = ?', stale)
+
+    def clear(self):
+        """
+        Remove all cached results
+        """
+        with self._connection() as conn:
+            conn.execute('DELETE FROM results')
+
+
+class MemoryEntry:
+    """
+    Cached response body and its bookkeeping
+    """
+
+    def __init__(self, data: str, expires=None):
+        self.data = data
+        self.size = sys.getsizeof(data)
+        self.expires = expires
+        self.count = None
+
+    def rows(self) -> int:
+        # Counted on demand, only needed when the cached limit is smaller than the requested one
+        if self.count is None:
+            self.count = slice_json_array(self.data)[1]
+        return self.count
+
+
+class MemoryCache(ResultCache):
+    """
+    Thread-safe in-process LRU cache bounded by memory size.
+    A JSON query can be answered from a cached result of the same query (predicates, fields, ordering)
+    with a larger limit or without one, the first rows are sliced locally
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024, ttl=None):
+        """
+        :param max_size: max total size of cached results in bytes
+        :param ttl: time to live in seconds, None means forever
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.subsumed = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._data = OrderedDict()  # (group, limit): MemoryEntry
+        self._groups = dict()  # group: {limit}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'{super(MemoryCache, self).__repr__()}\n{self.stats()}'
+
+    @staticmethod
+    def _group(url, payload):
+        # Queries differing only by limit share a group
+        return cache_key(url, {**payload, 'limit': None})
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self.size -= entry.size
+        limits = self._groups[key[0]]
+        limits.discard(key[1])
+        if not limits:
+            del self._groups[key[0]]
+
+    def _alive(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry.expires is not None and entry.expires < now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _covers(self, entry, cached_limit, limit) -> bool:
+        if cached_limit is None:
+            return True
+        if limit is not None and cached_limit >= limit:
+            return True
+        # Fewer rows than the limit means the result is complete
+        return entry.rows() < cached_limit
+
+    def get(self, url: str, payload: dict):
+        group, limit, now = self._group(url, payload), payload.get('limit'), time.time()
+        with self._lock:
+            entry = self._alive((group, limit), now)
+            if entry is not None:
+                self.hits += 1
+                self._data.move_to_end((group, limit))
+                return entry.data
+
+            # CSV headers and quoted line breaks make slicing unsafe, only JSON results are reused
+            if payload.get('output', 'json') == 'json':
+                # Smaller results are cheaper to slice, complete ones go last
+                limits = sorted(self._groups.get(group, ()), key=lambda x: (x is None, x or 0))
+                for cached_limit in limits:
+                    entry = self._alive((group, cached_limit), now)
+                    if entry is not None and self._covers(entry, cached_limit, limit):
+                        self.subsumed += 1
+                        self._data.move_to_end((group, cached_limit))
+                        break
+                else:
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+        if limit is None or (entry.count is not None and entry.count <= limit):
+            return entry.data
+        return slice_json_array(entry.data, limit)[0]
+
+    def set(self, url: str, payload: dict, data: str):
+        if self.ttl == 0:
+            return
+
+        entry = MemoryEntry(data, None if self.ttl is None else time.time() + self.ttl)
+        if entry.size > self.max_size:
+            return
+
+        group, limit = self._group(url, payload), payload.get('limit')
+        with self._lock:
+            stale = [(group, limit)]
+            if payload.get('output', 'json') == 'json':
+                # Results with a smaller limit are now answered from this one
+                stale += [
+                    (group, x) for x in self._groups.get(group, ())
+                    if x is not None and (limit is None or x < limit)
+                ]
+            for key in stale:
+                if key in self._data:
+                    self._remove(key)
+
+            self._data[group, limit] = entry
+            self._groups.setdefault(group, set()).add(limit)
+            self.size += entry.size
+            while self.size > self.max_size:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all cached results
+        """
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """
+        Cache usage statistics, `subsumed` queries were answered from results with a larger limit
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'subsumed': self.subsumed,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._data),
+                'size': self.size,
+                'max_size': self.max_size
+            }
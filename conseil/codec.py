@@ -0,0 +1,136 @@
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+# Digits -> '0', anything else -> ' ', a run of 19 zeros means a number which may not fit into 64 bits
+DIGITS = bytes(48 if 48 <= i <= 57 else 32 for i in range(256))
+LONG_NUMBER = b'0' * 19
+
+
+def encode_json(value) -> str:
+    """
+    Serialize to JSON, Decimal values are written as exact number literals
+    :param value: JSON-compatible object
+    :return: string
+    """
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f'Cannot encode {value}')
+        return str(value)
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{json.dumps(str(k))}:{encode_json(v)}' for k, v in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(x, (Decimal, dict, list, tuple)) for x in value):
+            return '[' + ','.join(map(encode_json, value)) + ']'
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _inexact(value) -> bool:
+    # Values third-party encoders may silently convert to float
+    if isinstance(value, dict):
+        return any(map(_inexact, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_inexact, value))
+    if isinstance(value, int) and not isinstance(value, bool):
+        return not -2 ** 63 <= value < 2 ** 64
+    return isinstance(value, Decimal)
+
+
+class JsonCodec:
+    """
+    Standard library JSON, always exact
+    """
+    name = 'json'
+
+    def dumps(self, value) -> bytes:
+        """
+        Encode request body
+        :param value: JSON-compatible object, may contain Decimal values
+        :return: bytes
+        """
+        return encode_json(value).encode()
+
+    def loads(self, data, **kwargs):
+        """
+        Decode response body
+        :param data: bytes or string
+        :param kwargs: `json.loads` options, e.g. `parse_float`
+        :return: object
+        """
+        return json.loads(data, **kwargs)
+
+
+class FastJsonCodec(JsonCodec):
+    """
+    Base class for third-party codecs, falls back to the standard library where they lose precision
+    """
+
+    def __init__(self, exact=True):
+        """
+        :param exact: check responses for integers over 64 bits (which would be decoded as floats)
+        """
+        self.exact = exact
+
+    def _dumps(self, value) -> bytes:
+        raise NotImplementedError
+
+    def _loads(self, data):
+        raise NotImplementedError
+
+    def dumps(self, value) -> bytes:
+        try:
+            return self._dumps(value)
+        except (TypeError, OverflowError):
+            # Decimal values and integers over 64 bits
+            return super(FastJsonCodec, self).dumps(value)
+
+    def loads(self, data, **kwargs):
+        if isinstance(data, str):
+            data = data.encode()
+        # Searching translated bytes is several times faster than a regular expression
+        if kwargs or (self.exact and data.translate(DIGITS).find(LONG_NUMBER) != -1):
+            return super(FastJsonCodec, self).loads(data, **kwargs)
+        return self._loads(data)
+
+
+class OrjsonCodec(FastJsonCodec):
+    name = 'orjson'
+
+    def _dumps(self, value) -> bytes:
+        return orjson.dumps(value)
+
+    def _loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(FastJsonCodec):
+    name = 'ujson'
+
+    def _dumps(self, value) -> bytes:
+        if _inexact(value):
+            raise TypeError('Exact encoding required')
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False).encode()
+
+    def _loads(self, data):
+        return ujson.loads(data)
+
+
+def default_codec() -> JsonCodec:
+    """
+    Get the fastest installed codec
+    :return: JsonCodec
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JsonCodec()
@@ -1,7 +1,10 @@
 from decimal import Decimal
+from threading import Thread
 
 from conseil.query import MetadataQuery, DataQuery
 from conseil.api import ConseilException
+from conseil.metadata import MetadataSnapshot
+from conseil.parallel import DEFAULT_WORKERS, run_concurrently
 
 
 def not_(predicate: dict):
@@ -282,3 +285,73 @@ class ConseilClient(MetadataQuery):
     __child_key__ = 'platform_id'
     __child_class__ = Platform
     __query_path__ = 'metadata/platforms'
+
+    def __init__(self, api='dev', snapshot=None, **kwargs):
+        """
+        :param api: `prod`, `dev`, or `ConseilApi` instance
+        :param snapshot: `MetadataSnapshot` or path to a snapshot file, enables offline metadata navigation
+        """
+        if isinstance(snapshot, str):
+            snapshot = MetadataSnapshot.load(snapshot)
+        super(ConseilClient, self).__init__(api, snapshot=snapshot, **kwargs)
+
+    def prefetch(self, platforms=None, networks=None, depth=3, max_workers=DEFAULT_WORKERS) -> MetadataSnapshot:
+        """
+        Concurrently request metadata tree level by level and warm up node caches
+        :param platforms: list of platforms to include, default is all
+        :param networks: list of networks to include, default is all
+        :param depth: 1 - networks, 2 - entities, 3 - attributes
+        :param max_workers: number of concurrent requests
+        :return: MetadataSnapshot with all received responses
+        """
+        snapshot = MetadataSnapshot()
+        filters = [platforms, networks]
+        nodes = [self]
+
+        for level in range(depth + 1):
+            responses = run_concurrently(lambda x: x._request(), nodes, max_workers=max_workers)
+            snapshot.update({node.path: res for node, res in zip(nodes, responses)})
+            if level == depth:
+                break
+
+            allowed = filters[level] if level < len(filters) else None
+            nodes = [
+                getattr(node, name)
+                for node in nodes
+                for name in node._attr_names
+                if not allowed or name in allowed
+            ]
+
+        return snapshot
+
+    def export_snapshot(self, filename=None, platforms=None, networks=None) -> MetadataSnapshot:
+        """
+        Download platforms, networks, entities and attributes metadata
+        :param filename: save snapshot to this file (optional)
+        :param platforms: list of platforms to include, default is all
+        :param networks: list of networks to include, default is all
+        :return: MetadataSnapshot
+        """
+        snapshot = self.prefetch(platforms=platforms, networks=networks)
+        if filename:
+            snapshot.save(filename)
+        return snapshot
+
+    def refresh(self, background=False):
+        """
+        Re-download every metadata path stored in the snapshot
+        :param background: do not wait, refresh in a separate thread
+        :return: Thread if background else None
+        """
+        snapshot = self['snapshot']
+        if snapshot is None:
+            raise ConseilException('Metadata snapshot is not used')
+
+        def update():
+            snapshot.update({path: self.api.get(path).json() for path in snapshot.paths()})
+
+        if background:
+            thread = Thread(target=update, daemon=True)
+            thread.start()
+            return thread
+        update()
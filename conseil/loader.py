@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from conseil.parallel import DEFAULT_WORKERS
+
+
+class BatchLoader:
+    """
+    Collect point lookups requested within a short window and resolve them with a single `in` query per batch
+    """
+
+    def __init__(self, query, key, batch_size=100, delay=0.005, max_workers=DEFAULT_WORKERS):
+        """
+        :param query: DataQuery to select rows from
+        :param key: Attribute used for lookups, e.g. Account.account_id
+        :param batch_size: max number of keys in a single request
+        :param delay: seconds to wait for more keys before sending a request
+        :param max_workers: max number of batches requested concurrently
+        """
+        self.query = query
+        self.key = key
+        self.batch_size = batch_size
+        self.delay = delay
+        self._pending = dict()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def load(self, value) -> Future:
+        """
+        Request a row by key value
+        :param value: key value
+        :return: Future resolving to a row or None (no or multiple rows found)
+        """
+        with self._lock:
+            future = self._pending.get(value)
+            if future is None:
+                future = self._pending[value] = Future()
+                if len(self._pending) >= self.batch_size:
+                    self._flush()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return future
+
+    def load_many(self, values) -> list:
+        """
+        Request rows by key values and wait for the results
+        :param values: iterable of key values
+        :return: list of rows (or None) in the same order
+        """
+        futures = [self.load(x) for x in values]
+        return [x.result() for x in futures]
+
+    def get(self, value):
+        """
+        Request a row by key value and wait for the result
+        :param value: key value
+        :return: row or None
+        """
+        return self.load(value).result()
+
+    def flush(self):
+        """
+        Send pending keys without waiting
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            self._executor.submit(self._dispatch, self._pending)
+            self._pending = dict()
+
+    def _dispatch(self, batch: dict):
+        try:
+            query = self.query.filter(self.key.in_(*batch))
+            key = self.key['attribute_id']
+            field_map, payload = query._prepare_with(key)
+
+            rows = dict()
+            for row in query._fetch(payload):
+                rows.setdefault(row[key], []).append(row)
+
+            for value, future in batch.items():
+                found = rows.get(value, [])
+                future.set_result(query._postprocess(found, field_map)[0] if len(found) == 1 else None)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    def close(self):
+        """
+        Send pending keys and release worker threads
+        """
+        self.flush()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,123 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+from conseil.api import ConseilException
+
+
+class MetadataSnapshot:
+    """
+    Copy of Conseil metadata tree (path -> response), can be saved to a file and loaded on startup
+    """
+    __format_version__ = 1
+
+    def __init__(self, data: dict = None):
+        self._data = dict(data or {})
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'{super(MetadataSnapshot, self).__repr__()}\n{len(self)} paths'
+
+    def __contains__(self, path):
+        return path in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, path):
+        return self._data.get(path)
+
+    def set(self, path, value):
+        with self._lock:
+            self._data[path] = value
+
+    def update(self, data: dict):
+        with self._lock:
+            self._data.update(data)
+
+    def paths(self):
+        return list(self._data)
+
+    def save(self, filename):
+        """
+        Write snapshot to a gzipped JSON file
+        :param filename: path to the file
+        """
+        with self._lock:
+            body = {'version': self.__format_version__, 'paths': self._data}
+            data = json.dumps(body, separators=(',', ':')).encode()
+        with gzip.open(filename, 'wb') as f:
+            f.write(data)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read snapshot from a file created by `save`
+        :param filename: path to the file
+        :return: MetadataSnapshot
+        """
+        with gzip.open(filename, 'rb') as f:
+            body = json.loads(f.read().decode())
+        if body.get('version') != cls.__format_version__:
+            raise ConseilException(f'Unsupported snapshot version {body.get("version")}')
+        return cls(body['paths'])
+
+
+class MetadataCache:
+    """
+    Thread-safe LRU cache of metadata responses, keyed by (api host, api version, path) and shared by all nodes
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        :param maxsize: max number of cached responses
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'{super(MetadataCache, self).__repr__()}\n{self.stats()}'
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Cache usage statistics
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize
+            }
+
+
+metadata_cache = MetadataCache()
@@ -0,0 +1,163 @@
+import hashlib
+from decimal import Decimal
+
+from conseil.codec import encode_json
+
+NUMBERS = (int, float, Decimal)
+RANGE_OPERATIONS = ['lt', 'gt', 'between']
+
+
+def canonical_json(value) -> str:
+    """
+    Serialize to JSON with sorted keys, Decimal values are written exactly
+    :param value: JSON-compatible object
+    :return: string
+    """
+    def sort_keys(x):
+        if isinstance(x, dict):
+            return {k: sort_keys(x[k]) for k in sorted(x)}
+        if isinstance(x, (list, tuple)):
+            return list(map(sort_keys, x))
+        return x
+
+    return encode_json(sort_keys(value))
+
+
+def _is_number(value):
+    return isinstance(value, NUMBERS) and not isinstance(value, bool)
+
+
+def _precision(values):
+    if values and all(map(lambda x: isinstance(x, Decimal), values)):
+        return max(map(lambda x: max(0, -x.as_tuple().exponent), values))
+
+
+def _predicate(field, operation, values, inverse=False, precision=None):
+    predicate = {'field': field, 'operation': operation, 'set': list(values), 'inverse': inverse}
+    precision = max(filter(lambda x: x is not None, [precision, _precision(values)]), default=None)
+    if precision is not None:
+        predicate['precision'] = precision
+    return predicate
+
+
+def _normalize_set(predicate: dict) -> dict:
+    if 'precision' not in predicate:
+        # Same as `Attribute._predicate`, so that `filter_by` and `==` give the same predicate
+        precision = _precision(predicate.get('set'))
+        if precision is not None:
+            predicate = {**predicate, 'precision': precision}
+
+    if predicate.get('operation') != 'in':
+        return predicate
+
+    # 1 == 1.0 == True, but they are different values for Conseil
+    values = list({(type(x), x): x for x in predicate['set']}.values())
+    try:
+        values.sort(key=lambda x: (x, type(x).__name__))
+    except TypeError:
+        values.sort(key=lambda x: (type(x).__name__, canonical_json(x)))
+
+    if len(values) == 1:
+        return {**predicate, 'operation': 'eq', 'set': values}
+    return {**predicate, 'set': values}
+
+
+def _bounds(predicate: dict) -> list:
+    # (side, value, strict) where side is 1 for lower and -1 for upper bound
+    operation, values, inverse = predicate['operation'], predicate['set'], predicate['inverse']
+    if operation == 'between':
+        return [] if inverse else [(1, values[0], False), (-1, values[1], False)]
+    if operation == 'gt':
+        return [(-1, values[0], False)] if inverse else [(1, values[0], True)]
+    if operation == 'lt':
+        return [(1, values[0], False)] if inverse else [(-1, values[0], True)]
+    return []
+
+
+def _tightest(bounds: list, side: int):
+    # Max of lower bounds / min of upper bounds, strict bound wins the tie
+    return max(bounds, key=lambda x: (x[1] * side, x[2]), default=None)
+
+
+def _merge_ranges(field: str, predicates: list) -> list:
+    # All predicates share the same precision
+    bounds = [x for p in predicates for x in _bounds(p)]
+    precision = predicates[0].get('precision')
+    if all(_is_number(x[1]) for x in bounds):
+        lower = _tightest([x for x in bounds if x[0] == 1], 1)
+        upper = _tightest([x for x in bounds if x[0] == -1], -1)
+    elif len(bounds) == 2 and {x[0] for x in bounds} == {1, -1} and not any(x[2] for x in bounds):
+        # Lexicographical order of the server is unknown, so non-numeric bounds are only joined
+        lower, upper = sorted(bounds, reverse=True)
+    else:
+        return predicates
+
+    if lower and upper and not lower[2] and not upper[2]:
+        return [_predicate(field, 'between', [lower[1], upper[1]], precision=precision)]
+
+    res = []
+    if lower:
+        strict = lower[2]
+        res.append(_predicate(field, 'gt' if strict else 'lt', [lower[1]], not strict, precision))
+    if upper:
+        strict = upper[2]
+        res.append(_predicate(field, 'lt' if strict else 'gt', [upper[1]], not strict, precision))
+    return res
+
+
+def normalize_predicates(predicates: list) -> list:
+    """
+    Deduplicate `in` sets and predicates, join range predicates on the same field, sort
+    :param predicates: conjunction of predicates
+    :return: equivalent list of predicates
+    """
+    predicates = list({canonical_json(x): x for x in map(_normalize_set, predicates)}.values())
+
+    # The server rounds the column to the predicate precision, so only bounds with equal precision are joined
+    ranges = dict()
+    for predicate in predicates:
+        if predicate.get('operation') in RANGE_OPERATIONS and _bounds(predicate):
+            ranges.setdefault((predicate['field'], predicate.get('precision')), []).append(predicate)
+
+    res = [x for x in predicates if not (x.get('operation') in RANGE_OPERATIONS and _bounds(x))]
+    for (field, _), items in ranges.items():
+        res.extend(_merge_ranges(field, items) if len(items) > 1 else items)
+
+    unique = {canonical_json(x): x for x in res}
+    return [unique[k] for k in sorted(unique)]
+
+
+def normalize(payload: dict) -> dict:
+    """
+    Rewrite Conseil query to the canonical form: logically identical queries become equal
+    :param payload: Conseil query
+    :return: Conseil query
+    """
+    aggregation = []
+    for item in payload.get('aggregation') or []:
+        if item.get('predicate'):
+            item = {**item, 'predicate': _normalize_set(item['predicate'])}
+        if item not in aggregation:
+            aggregation.append(item)
+
+    order_by = []
+    for item in payload.get('orderBy') or []:
+        if all(x['field'] != item['field'] for x in order_by):
+            order_by.append(item)
+
+    return {
+        **payload,
+        'fields': list(dict.fromkeys(payload.get('fields') or [])),
+        'predicates': normalize_predicates(payload.get('predicates') or []),
+        'aggregation': aggregation,
+        'orderBy': order_by
+    }
+
+
+def payload_hash(payload: dict) -> str:
+    """
+    Stable hash of Conseil query, equal for logically identical queries
+    :param payload: Conseil query
+    :return: hex digest
+    """
+    return hashlib.sha256(canonical_json(normalize(payload)).encode()).hexdigest()
@@ -0,0 +1,136 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+from conseil.aggregate import merge_aggregated, partial_payload, sort_key
+from conseil.stream import iter_csv
+
+DEFAULT_WORKERS = 8
+
+
+def run_concurrently(func, items, max_workers=DEFAULT_WORKERS):
+    """
+    Apply function to every item on a thread pool
+    :param func: callable
+    :param items: iterable of arguments
+    :param max_workers: pool size
+    :return: list of results (same order as items)
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return list(map(func, items))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def merge_sorted(results: list, order_by: list, limit=None):
+    """
+    Merge several sorted results preserving the order
+    :param results: list of lists of rows
+    :param order_by: sort rules
+    :param limit: max number of rows
+    :return: list
+    """
+    if order_by:
+        rows = heapq.merge(*results, key=sort_key(order_by))
+    else:
+        rows = (row for res in results for row in res)
+    if limit is not None:
+        return [row for _, row in zip(range(limit), rows)]
+    return list(rows)
+
+
+def with_sort_fields(payload: dict):
+    """
+    Select `orderBy` columns, so that partial results can be merged on the client
+    :param payload: Conseil query
+    :return: tuple (Conseil query, list of added fields)
+    """
+    fields = payload['fields']
+    if not fields or payload['aggregation']:
+        return payload, []
+    extra = list(dict.fromkeys(x['field'] for x in payload['orderBy'] if x['field'] not in fields))
+    if not extra:
+        return payload, []
+    return {**payload, 'fields': fields + extra}, extra
+
+
+def drop_fields(rows: list, fields: list) -> list:
+    """
+    Remove columns added by `with_sort_fields`
+    :param rows: list of dicts
+    :param fields: column names
+    :return: list
+    """
+    if not fields:
+        return rows
+    return [{k: v for k, v in x.items() if k not in fields} for x in rows]
+
+
+class PartitionedQuery:
+    """
+    Several subqueries of a single query executed concurrently, results are merged back
+    """
+
+    def __init__(self, query, parts: list, max_workers=DEFAULT_WORKERS):
+        """
+        :param query: original DataQuery, defines postprocessing, ordering and limit
+        :param parts: list of DataQuery, each selecting a disjoint subset of the original query
+        :param max_workers: number of concurrent requests
+        """
+        self.query = query
+        self.parts = parts
+        self.max_workers = max_workers
+
+    def __repr__(self):
+        offset = len(self.query['predicates'] or [])
+        res = [
+            super(PartitionedQuery, self).__repr__(),
+            '\nPartitions',
+            *map(lambda x: repr(list(x['predicates'] or [])[offset:]), self.parts)
+        ]
+        return '\n'.join(res)
+
+    def payloads(self):
+        """
+        Conseil queries for every partition
+        :return: list
+        """
+        return [part._prepare('json')[1] for part in self.parts]
+
+    def _execute(self):
+        payloads = self.payloads()
+        aggregated = any(map(lambda x: x['aggregation'], payloads))
+        if aggregated:
+            payloads = list(map(partial_payload, payloads))
+        else:
+            payloads, extra = zip(*map(with_sort_fields, payloads))
+
+        results = run_concurrently(
+            lambda x: x[0]._fetch(x[1]),
+            zip(self.parts, payloads),
+            max_workers=self.max_workers
+        )
+        if aggregated:
+            return merge_aggregated(results, self.query._prepare('json')[1])
+        data = merge_sorted(results, self.query['order_by'] or [], self.query['limit'])
+        return drop_fields(data, extra[0] if extra else [])
+
+    def all(self, output='json'):
+        """
+        Get all results, partitions are requested concurrently
+        :param output: output format (json/csv), default is JSON
+        :return: list (json) or string (csv)
+        """
+        data = self.query._postprocess(self._execute(), self.query.field_map())
+        if output == 'csv':
+            return ''.join(iter_csv(data))
+        if output != 'json':
+            raise NotImplementedError(output)
+        return data
+
+    def vector(self):
+        """
+        Get an array of values for a single column
+        :return: list
+        """
+        return self.query._vector(self.all())
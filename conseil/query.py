@@ -1,19 +1,92 @@
 import io
-import csv
+import json
+import asyncio
+from collections import namedtuple
+from decimal import Decimal
 from os.path import basename
-from functools import lru_cache
+from functools import partial
+from itertools import islice
+from operator import itemgetter
 from pprint import pformat
 
+from conseil.aggregate import merge_aggregated, partial_payload
 from conseil.api import ConseilApi, ConseilException
+from conseil.cache import cache_key
+from conseil.codec import JsonCodec
 from conseil.docstring import InlineDocstring, get_class_docstring
+from conseil.loader import BatchLoader
+from conseil.metadata import metadata_cache
+from conseil.normalize import normalize
+from conseil.parallel import DEFAULT_WORKERS, PartitionedQuery, drop_fields, merge_sorted, run_concurrently, \
+    with_sort_fields
+from conseil.singleflight import SingleFlight, single_flight
+from conseil.stream import CHUNK_SIZE, iter_csv, iter_json_array, iter_text, rewrite_csv
+from conseil.types import arrow_batch, arrow_schema, numpy_array, python_converter, pyarrow, require
+
+
+DEFAULT_CHUNK_SIZE = 1000
+ROW_OUTPUTS = ['tuple', 'record']
 
 
 def list2csv(data: list):
-    fp = io.StringIO()
-    writer = csv.DictWriter(fp, fieldnames=data[0].keys())
-    writer.writeheader()
-    writer.writerows(data)
-    return fp.getvalue()
+    return ''.join(iter_csv(data))
+
+
+def _getter(keys: list):
+    # `itemgetter` returns a bare value for a single key
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda x: (x[key],)
+    if keys:
+        return itemgetter(*keys)
+    return lambda x: ()
+
+
+def projection(keys: list, field_map: dict):
+    """
+    Compile postprocessing rules into a function building result rows
+    :param keys: raw column names in the response order
+    :param field_map: {column: new name or False to drop}
+    :return: function
+    """
+    def generic(row):
+        return {
+            field_map.get(k, k): v
+            for k, v in row.items()
+            if field_map.get(k) is not False
+        }
+
+    # Rows of a single response share the same columns, so kept values are picked in a fixed order,
+    # rows having different columns fall back to the generic rules
+    kept = [k for k in keys if field_map.get(k) is not False]
+    names = tuple(field_map.get(k, k) for k in kept)
+    getter, size = _getter(kept), len(keys)
+
+    def project(row):
+        if len(row) == size:
+            try:
+                return dict(zip(names, getter(row)))
+            except KeyError:
+                pass
+        return generic(row)
+
+    return project
+
+
+def row_factory(keys: list, names: list, output: str):
+    """
+    Build a function converting decoded rows to tuples or records
+    :param keys: raw column names in the resulting order
+    :param names: resulting column names (labels)
+    :param output: `tuple` or `record` (namedtuple)
+    :return: function
+    """
+    getter = _getter(keys)
+    if output == 'tuple':
+        return getter
+
+    make = namedtuple('Record', names, rename=True)._make
+    return lambda x: make(getter(x))
 
 
 class Query(metaclass=InlineDocstring):
@@ -54,8 +127,8 @@ class Query(metaclass=InlineDocstring):
     def _extend(self, **kwargs):
         params = self._kwargs.copy()
         for key, value in kwargs.items():
-            if isinstance(params.get(key), list):
-                params[key].extend(value)
+            if isinstance(params.get(key), (list, tuple)):
+                params[key] = [*params[key], *value]
             else:
                 params[key] = value
         return params
@@ -81,14 +154,29 @@ class MetadataQuery(Query):
     __child_key__ = None
     __child_class__ = None
 
-    @lru_cache(maxsize=None)
-    def _request(self):
-        try:
-            if self.__query_path__:
-                return self.api.get(self.path).json()
-        except ConseilException:
-            pass
-        return list()
+    def _request(self, path=None):
+        path = path or self.path
+        snapshot = self['snapshot']
+        if snapshot is not None:
+            data = snapshot.get(path)
+            if data is not None:
+                return data
+        return self._fetch(path)
+
+    def _fetch(self, path):
+        if not path:
+            return list()
+
+        cache = self['metadata_cache'] or metadata_cache
+        key = (self.api.host, self.api.version, path)
+        data = cache.get(key)
+        if data is None:
+            try:
+                data = self.api.get(path).json()
+            except ConseilException:
+                return list()
+            cache.set(key, data)
+        return data
 
     @property
     def _attr_names(self):
@@ -119,23 +207,28 @@ class MetadataQuery(Query):
     def __dir__(self):
         return list(super(MetadataQuery, self).__dir__()) + list(self._attr_names)
 
-    @lru_cache(maxsize=None)
     def __getattr__(self, item):
         if self.__child_class__:
-            kwargs = {
-                self.__child_key__: item,
-                **self._kwargs
-            }
-            return self.__child_class__(self.api, **kwargs)
+            # Children are kept by their parent only, so the tree is released together with its root
+            children = self.__dict__.setdefault('_children', dict())
+            child = children.get(item)
+            if child is None:
+                kwargs = {
+                    self.__child_key__: item,
+                    **self._kwargs
+                }
+                child = children[item] = self.__child_class__(self.api, **kwargs)
+            return child
         raise ConseilException(item)
 
 
 class DataQuery(Query):
     __query_path__ = 'data/{platform_id}/{network_id}/{entity_id}'
 
-    def payload(self):
+    def payload(self, normalized=False):
         """
         Resulting Conseil query
+        :param normalized: rewrite to the canonical form (sorted and deduplicated predicates, joined ranges)
         :return: object
         """
         attributes = self['attributes'] or dict()
@@ -153,7 +246,7 @@ class DataQuery(Query):
         fields = [x['attribute_id'] for x in attributes.values() if not x['aggregation']]
         fields.extend([x['attribute_id'] for x in group_by if x not in fields])
 
-        return {
+        payload = {
             'fields': fields,
             'predicates': list(self['predicates'] or []),
             'aggregation': aggregation,
@@ -161,6 +254,7 @@ class DataQuery(Query):
             'limit': self['limit'],
             'output': self['output']
         }
+        return normalize(payload) if normalized else payload
 
     def field_map(self):
         """
@@ -181,15 +275,22 @@ class DataQuery(Query):
 
         return field_map
 
-    def _postprocess(self, data: list, field_map: dict):
-        def process(item):
-            return {
-                field_map.get(k, k): v
-                for k, v in item.items()
-                if field_map.get(k) is not False
-            }
+    def _iter_postprocess(self, data, field_map: dict):
+        convert = self._converter()
+        data = map(convert, data) if convert else iter(data)
+        return self._iter_projected(data, field_map) if field_map else data
 
-        return list(map(process, data))
+    @staticmethod
+    def _iter_projected(data, field_map: dict):
+        first = next(data, None)
+        if first is None:
+            return
+        project = projection(list(first), field_map)
+        yield project(first)
+        yield from map(project, data)
+
+    def _postprocess(self, data: list, field_map: dict):
+        return list(self._iter_postprocess(data, field_map))
 
     def __repr__(self):
         res = [
@@ -267,41 +368,389 @@ class DataQuery(Query):
         """
         return self._spawn(having=args)
 
-    def all(self, output='json'):
+    def typed(self):
         """
-        Get all results
-        :param output: output format (json/csv), default is JSON
-        :return: list (json) or string (csv)
+        Convert values according to attributes metadata: DateTime to datetime, Decimal to Decimal, Int to int
+        :return: DataQuery
+        """
+        return self._spawn(typed=True)
+
+    def cached(self, cache):
+        """
+        Use result cache for this query
+        :param cache: `ResultCache` instance, e.g. `DiskCache`
+        :return: DataQuery
+        """
+        return self._spawn(cache=cache)
+
+    def single_flight(self, group: SingleFlight = None):
+        """
+        Share one request and decoded result between concurrent identical queries (e.g. from several threads)
+        :param group: `SingleFlight` instance, module-wide group is used by default
+        :return: DataQuery
+        """
+        return self._spawn(single_flight=group or single_flight)
+
+    def chunked(self, chunk_size: int, max_workers=DEFAULT_WORKERS):
+        """
+        Split `in` predicates having more than `chunk_size` values into several concurrent requests
+        :param chunk_size: max number of values in a single predicate
+        :param max_workers: number of concurrent requests
+        :return: DataQuery
+        """
+        return self._spawn(chunk_size=chunk_size, max_workers=max_workers)
+
+    def loader(self, key, batch_size=100, delay=0.005) -> BatchLoader:
+        """
+        Batch point lookups by key into `in` queries
+        :param key: attribute used for lookups
+        :param batch_size: max number of keys in a single request
+        :param delay: seconds to wait for more keys before sending a request
+        :return: BatchLoader
+        """
+        return BatchLoader(self, key, batch_size=batch_size, delay=delay)
+
+    def partition(self, attribute, start, end, parts: int, max_workers=DEFAULT_WORKERS) -> PartitionedQuery:
+        """
+        Split query into subqueries over disjoint ranges of an attribute, to be executed concurrently
+        :param attribute: attribute to split by, e.g. level or timestamp
+        :param start: range start (inclusive)
+        :param end: range end (inclusive)
+        :param parts: number of subqueries
+        :param max_workers: number of concurrent requests
+        :return: PartitionedQuery
+        """
+        if parts < 1 or start > end:
+            raise ConseilException('Invalid partitioning')
+
+        if isinstance(start, int) and isinstance(end, int):
+            parts = min(parts, end - start + 1)
+            bounds = [start + (end - start + 1) * i // parts for i in range(parts + 1)]
+            predicates = [
+                [attribute.between(bounds[i], bounds[i + 1] - 1)]
+                for i in range(parts)
+            ]
+        else:
+            step = (end - start) / parts
+            bounds = [start + step * i for i in range(parts)] + [end]
+            predicates = [
+                [attribute >= bounds[i], attribute < bounds[i + 1]]
+                for i in range(parts - 1)
+            ]
+            predicates.append([attribute >= bounds[-2], attribute <= end])
+
+        return PartitionedQuery(self, [self.filter(*x) for x in predicates], max_workers=max_workers)
+
+    def across(self, *networks, max_workers=DEFAULT_WORKERS) -> PartitionedQuery:
         """
+        Run the same query on several networks concurrently and merge the results
+        :param networks: network names
+        :param max_workers: number of concurrent requests
+        :return: PartitionedQuery
+        """
+        return PartitionedQuery(self, [self._spawn(network_id=x) for x in networks], max_workers=max_workers)
+
+    def _field_types(self, raw=False):
+        metadata = MetadataQuery(self.api, **self._kwargs)._request(
+            'metadata/{platform_id}/{network_id}/{entity_id}/attributes'.format(**self._kwargs)
+        )
+        types = {x['name']: x.get('dataType') for x in metadata if isinstance(x, dict) and 'name' in x}
+
+        attributes = self['attributes'] or dict()
+        if not attributes:
+            return types
+
+        res = dict()
+        for attribute_id, attr in attributes.items():
+            aggregation = attr['aggregation']
+            if not aggregation:
+                data_type = types.get(attribute_id)
+            elif aggregation['function'] == 'count':
+                data_type = 'Int'
+            elif aggregation['function'] == 'avg':
+                data_type = 'Decimal'
+            else:
+                data_type = types.get(aggregation['field'])
+            res[attribute_id if raw else attr['label'] or attribute_id] = data_type
+        return res
+
+    def _converter(self):
+        # Compiled once per query, rows are converted before renaming so raw column names are used
+        if not self['typed']:
+            return None
+        if '_convert' not in self.__dict__:
+            self.__dict__['_convert'] = python_converter(self._field_types(raw=True))
+        return self.__dict__['_convert']
+
+    def _postprocessed(self, field_map, output='json'):
+        return bool(field_map) or (output == 'json' and self['typed'])
+
+    def _json_options(self):
+        return {'parse_float': Decimal} if self['typed'] else {}
+
+    def _prepare(self, output):
         field_map = self.field_map()
-        self._kwargs['output'] = 'json' if field_map else output
+        self._kwargs['output'] = 'json' if field_map or output in ROW_OUTPUTS else output
+        return field_map, self.payload(normalized=True)
+
+    def _prepare_with(self, key):
+        # Make sure raw rows contain the key column, add it to the query and drop while postprocessing if needed
+        field_map, payload = self._prepare('json')
+        aggregated = [f'{x["function"]}_{x["field"]}' for x in payload['aggregation']]
+        if key in aggregated:
+            raise ConseilException(f'Aggregated column `{key}` cannot be used as a key')
+        if payload['fields'] and key not in payload['fields']:
+            if aggregated:
+                raise ConseilException(f'Key column `{key}` has to be selected')
+            payload['fields'].append(key)
+            field_map = {**field_map, key: False}
+        return field_map, payload
+
+    @property
+    def _url(self):
+        return f'{self.api.host}/v{self.api.version}/{self.path}'
+
+    def _cached(self, payload):
+        cache = self['cache']
+        if cache is not None:
+            return cache.get(self._url, payload)
+
+    def _store(self, payload, res):
+        cache = self['cache']
+        if cache is not None:
+            cache.set(self._url, payload, res.text)
+
+    def _parse(self, res, payload):
+        return res.text if payload['output'] == 'csv' else res.json(**self._json_options())
+
+    def _loads(self, text, payload):
+        if payload['output'] == 'csv':
+            return text
+        codec = getattr(self.api, 'codec', None)
+        if not isinstance(codec, JsonCodec):
+            codec = JsonCodec()
+        return codec.loads(text, **self._json_options())
+
+    def _oversized(self, payload):
+        chunk_size = self['chunk_size'] or DEFAULT_CHUNK_SIZE
+        predicates = [
+            i for i, x in enumerate(payload['predicates'])
+            if x['operation'] == 'in' and len(x['set']) > chunk_size
+        ]
+        return max(predicates, key=lambda i: len(payload['predicates'][i]['set']), default=None)
+
+    def _fetch_chunked(self, payload, index):
+        chunk_size = self['chunk_size'] or DEFAULT_CHUNK_SIZE
+        predicate = payload['predicates'][index]
+        field = predicate['field']
+        values = list(dict.fromkeys(predicate['set']))
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+        def replace(chunk, **kwargs):
+            predicates = list(payload['predicates'])
+            predicates[index] = {**predicate, 'set': chunk}
+            return {**payload, 'predicates': predicates, 'output': 'json', **kwargs}
+
+        if len(chunks) == 1:
+            data = self._fetch(replace(chunks[0]))
+        elif predicate['inverse']:
+            # Intersecting full results of every chunk is expensive, so the server excludes
+            # the first chunk only and the rest of values are filtered out on the client
+            if payload['aggregation']:
+                raise ConseilException(f'Aggregated query cannot split `notin` predicate on `{field}`')
+            limit, order_by = payload['limit'], payload['orderBy']
+            if limit is not None and not order_by:
+                raise ConseilException(f'Limited query has to be ordered to split `notin` predicate on `{field}`')
+
+            fields = payload['fields']
+            key = order_by[0]['field'] if order_by else None
+            extra = [x for x in dict.fromkeys([field, key]) if x and fields and x not in fields]
+            rest = set(values[chunk_size:])
+            first = replace(chunks[0], limit=None, fields=fields + extra)
+            if limit is None:
+                data = [x for x in self._fetch(first) if x.get(field) not in rest]
+            else:
+                # Page by the order key until enough rows survive the filter, the first page
+                # is large enough unless several rows share an excluded value
+                data = []
+                pages = self._iter_keyset(first, key, order_by[0]['direction'], limit + len(rest))
+                for page in pages:
+                    data.extend(x for x in page if x.get(field) not in rest)
+                    if len(data) >= limit:
+                        pages.close()
+                        break
+                data = data[:limit]
+            if extra:
+                data = [{k: v for k, v in x.items() if k not in extra} for x in data]
+        else:
+            payloads = list(map(replace, chunks))
+            extra = []
+            if payload['aggregation']:
+                payloads = list(map(partial_payload, payloads))
+            else:
+                # Chunks are merged on the sort columns, so they have to be selected
+                payloads, extra = zip(*map(with_sort_fields, payloads))
+                extra = extra[0]
+            results = run_concurrently(self._fetch, payloads, max_workers=self['max_workers'] or DEFAULT_WORKERS)
+            if payload['aggregation']:
+                data = merge_aggregated(results, payload)
+            else:
+                data = drop_fields(merge_sorted(results, payload['orderBy'], payload['limit']), extra)
+
+        return list2csv(data) if payload['output'] == 'csv' else data
+
+    def _fetch(self, payload):
+        group = self['single_flight']
+        if group is None:
+            return self._fetch_once(payload)
+
+        # Decoding options are a part of the key, typed queries do not share results with raw ones
+        key = (cache_key(self._url, payload), bool(self['typed']))
+        data, shared = group.do(key, self._fetch_once, payload)
+        return list(data) if shared and isinstance(data, list) else data
+
+    def _fetch_once(self, payload):
+        index = self._oversized(payload)
+        if index is not None:
+            return self._fetch_chunked(payload, index)
+
+        text = self._cached(payload)
+        if text is not None:
+            return self._loads(text, payload)
+
+        res = self.api.post(path=self.path, json=payload)
+        self._store(payload, res)
+        return self._parse(res, payload)
+
+    def _stream(self, payload, field_map, output):
+        data = self._cached(payload)
+        if data is not None:
+            data = self._loads(data, payload)
+        elif self._oversized(payload) is not None:
+            data = self._fetch(payload)
+        if data is not None:
+            if isinstance(data, str):
+                yield data
+            else:
+                data = self._iter_postprocess(data, field_map) if self._postprocessed(field_map) else data
+                yield from iter_csv(data) if output == 'csv' else data
+            return
+
+        res = self.api.post(path=self.path, json=payload, stream=True)
+        try:
+            chunks = res.iter_content(chunk_size=CHUNK_SIZE)
+            if output == 'csv' and not field_map:
+                yield from iter_text(chunks)
+            else:
+                data = iter_json_array(chunks, json.JSONDecoder(**self._json_options()))
+                if self._postprocessed(field_map):
+                    data = self._iter_postprocess(data, field_map)
+                if output == 'csv':
+                    data = iter_csv(data)
+                yield from data
+        finally:
+            res.close()
 
-        res = self.api.post(path=self.path, json=self.payload())
-        if field_map:
-            data = self._postprocess(res.json(), field_map)
+    def _finalize(self, data, field_map, output):
+        if self._postprocessed(field_map, output):
+            data = self._postprocess(data, field_map)
             if output == 'csv':
                 data = list2csv(data)
-        elif output == 'json':
-            data = res.json()
-        elif output == 'csv':
-            data = res.text
-        else:
+        elif output not in ['json', 'csv']:
             raise NotImplementedError(output)
 
         return data
 
-    def one(self):
-        """
-        Get single result, fail if there are no or multiple records (json only)
-        :return: object
-        """
-        res = self.all()
+    async def _post_async(self, payload):
+        post_async = getattr(self.api, 'post_async', None)
+        if asyncio.iscoroutinefunction(post_async):
+            return await post_async(path=self.path, json=payload)
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(self.api.post, path=self.path, json=payload))
+
+    async def _run_async(self, func, *args):
+        # Blocking work goes to the api pool, so that its requests share the api concurrency limit
+        run_async = getattr(self.api, 'run_async', None)
+        if asyncio.iscoroutinefunction(run_async):
+            return await run_async(func, *args)
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+
+    @staticmethod
+    def _one(res):
         if len(res) == 0:
             raise ConseilException('Not found')
         if len(res) > 1:
             raise ConseilException('Multiple results')
         return res[0]
 
+    @staticmethod
+    def _scalar(res):
+        if len(res) != 1:
+            raise ConseilException('Multiple keys')
+        return next(iter(res.values()))
+
+    @staticmethod
+    def _iter_vector(res):
+        key = None
+        for row in res:
+            if key is None:
+                if len(row) != 1:
+                    raise ConseilException('Multiple keys')
+                key = next(iter(row))
+            yield row[key]
+
+    @staticmethod
+    def _vector(res):
+        if len(res) > 0:
+            if len(res[0]) != 1:
+                raise ConseilException('Multiple keys')
+            key = next(iter(res[0]))
+            vector = list(map(lambda x: x[key], res))
+        else:
+            vector = list()
+        return vector
+
+    def _iter_tuples(self, data, field_map, output):
+        # Column order and labels are resolved once from the first row
+        make = None
+        for row in data:
+            if make is None:
+                keys = [k for k in row if field_map.get(k) is not False]
+                make = row_factory(keys, [field_map.get(k, k) for k in keys], output)
+            yield make(row)
+
+    def all(self, output='json', stream=False):
+        """
+        Get all results
+        :param output: output format (json/csv/tuple/record), default is JSON
+        :param stream: decode response incrementally and return a generator of rows (json) or text chunks (csv)
+        :return: list (json, tuple, record) or string (csv)
+        """
+        field_map, payload = self._prepare(output)
+        if output in ROW_OUTPUTS:
+            if stream:
+                # Rows are decoded one by one, so a dict per row never piles up
+                return self._iter_tuples(self._stream(payload, dict(), 'json'), field_map, output)
+            # Fetched as JSON to share the result cache, single flight and chunking with other outputs
+            data = self._finalize(self._fetch(payload), dict(), 'json')
+            return list(self._iter_tuples(data, field_map, output))
+        if stream:
+            if output not in ['json', 'csv']:
+                raise NotImplementedError(output)
+            return self._stream(payload, field_map, output)
+
+        return self._finalize(self._fetch(payload), field_map, output)
+
+    def one(self):
+        """
+        Get single result, fail if there are no or multiple records (json only)
+        :return: object
+        """
+        return self._one(self.all())
+
     def one_or_none(self):
         """
         Get single result or None (do not fail)
@@ -317,22 +766,311 @@ class DataQuery(Query):
         Get value of a single attribute (single column, single row)
         :return: scalar
         """
-        res = self.one()
-        if len(res) != 1:
-            raise ConseilException('Multiple keys')
-        return next(iter(res.values()))
+        return self._scalar(self.one())
 
-    def vector(self):
+    def vector(self, stream=False):
         """
         Get an array of values for a single column
+        :param stream: decode response incrementally and return a generator
         :return: list
         """
-        res = self.all()
-        if len(res) > 0:
-            if len(res[0]) != 1:
-                raise ConseilException('Multiple keys')
-            key = next(iter(res[0]))
-            vector = list(map(lambda x: x[key], res))
+        if stream:
+            return self._iter_vector(self.all(stream=True))
+        return self._vector(self.all())
+
+    def _untyped(self):
+        # Columnar exports convert raw values by attributes metadata, `typed` values do not fit their dtypes
+        return self._spawn(typed=False) if self['typed'] else self
+
+    def columns(self) -> dict:
+        """
+        Get results as NumPy arrays, dtypes are derived from attributes metadata (requires numpy)
+        :return: dict {field name: numpy.ndarray}
+        """
+        types = self._field_types()
+        columns = dict()
+        for row in self._untyped().all(stream=True):
+            for key, value in row.items():
+                columns.setdefault(key, []).append(value)
+
+        if not columns:
+            columns = {key: [] for key in types}
+        return {key: numpy_array(values, types.get(key)) for key, values in columns.items()}
+
+    def _iter_batches(self, page_size):
+        if self['order_by']:
+            yield from self.iter_pages(page_size)
         else:
-            vector = list()
-        return vector
+            rows = self.all(stream=True)
+            while True:
+                batch = list(islice(rows, page_size))
+                if not batch:
+                    break
+                yield batch
+
+    def _iter_record_batches(self, page_size, types):
+        schema = None
+        for page in self._iter_batches(page_size):
+            if schema is None:
+                schema = arrow_schema(page, types)
+            yield arrow_batch(page, schema)
+
+    def to_arrow(self, page_size=10000):
+        """
+        Get results as Arrow table, schema is derived from attributes metadata (requires pyarrow)
+        :param page_size: number of rows per record batch (and per request if query is sorted)
+        :return: pyarrow.Table
+        """
+        pa = require(pyarrow, 'pyarrow')
+        types = self._field_types()
+        batches = list(self._untyped()._iter_record_batches(page_size, types))
+        if not batches:
+            return arrow_schema([], types).empty_table()
+        return pa.Table.from_batches(batches)
+
+    def to_parquet(self, path, page_size=10000, **kwargs):
+        """
+        Write results to Parquet file page by page, memory usage is bounded by the page size (requires pyarrow)
+        :param path: file path or writable file object
+        :param page_size: number of rows per record batch (and per request if query is sorted)
+        :param kwargs: options passed to `pyarrow.parquet.ParquetWriter`
+        :return: number of written rows
+        """
+        require(pyarrow, 'pyarrow')
+        import pyarrow.parquet as pq
+
+        types = self._field_types()
+        writer, count = None, 0
+        try:
+            for batch in self._untyped()._iter_record_batches(page_size, types):
+                if writer is None:
+                    writer = pq.ParquetWriter(path, batch.schema, **kwargs)
+                writer.write_batch(batch)
+                count += batch.num_rows
+            if writer is None:
+                writer = pq.ParquetWriter(path, arrow_schema([], types), **kwargs)
+        finally:
+            if writer is not None:
+                writer.close()
+        return count
+
+    def to_csv(self, fp) -> int:
+        """
+        Write results in CSV format without holding the whole response in memory
+        :param fp: file path, text or binary file object, or socket
+        :return: number of written characters
+        """
+        if isinstance(fp, str):
+            with open(fp, 'w', newline='') as f:
+                return self.to_csv(f)
+
+        if hasattr(fp, 'sendall'):
+            write = lambda x: fp.sendall(x.encode())
+        elif isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(fp, 'mode', ''):
+            write = lambda x: fp.write(x.encode())
+        else:
+            write = fp.write
+
+        field_map, payload = self._prepare('csv')
+        payload['output'] = 'csv'
+
+        res, data = None, self._cached(payload)
+        if data is None and self._oversized(payload) is not None:
+            data = self._fetch(payload)
+        if data is None:
+            res = self.api.post(path=self.path, json=payload, stream=True)
+            chunks = iter_text(res.iter_content(chunk_size=CHUNK_SIZE))
+        else:
+            chunks = [data]
+
+        count = 0
+        try:
+            # Labels and dropped columns are applied to the server CSV line by line
+            for chunk in rewrite_csv(chunks, field_map) if field_map else chunks:
+                write(chunk)
+                count += len(chunk)
+        finally:
+            if res is not None:
+                res.close()
+        return count
+
+    def _keyset(self, field, value, direction, strict=True):
+        if direction == 'desc':
+            return {'field': field, 'operation': 'lt' if strict else 'gt', 'set': [value], 'inverse': not strict}
+        return {'field': field, 'operation': 'gt' if strict else 'lt', 'set': [value], 'inverse': not strict}
+
+    def iter_pages(self, page_size=1000):
+        """
+        Fetch results page by page, paginating by the first `order_by` column (keyset)
+        :param page_size: number of rows per request
+        :return: generator of lists
+        """
+        order_by = self['order_by'] or []
+        if not order_by:
+            raise ConseilException('Keyset pagination requires order_by')
+        key, direction = order_by[0]['field'], order_by[0]['direction']
+
+        field_map, payload = self._prepare_with(key)
+        for page in self._iter_keyset(payload, key, direction, page_size):
+            yield self._postprocess(page, field_map)
+
+    def _iter_keyset(self, payload, key, direction, page_size):
+        # Raw pages of the query ordered by `key`, the payload limit is the total number of rows
+        predicates = payload['predicates']
+        remaining = payload['limit']
+        boundary = None
+
+        while remaining is None or remaining > 0:
+            page_limit = page_size if remaining is None else min(page_size, remaining)
+            payload['predicates'] = predicates + ([boundary] if boundary else [])
+            payload['limit'] = page_limit
+            page = self._fetch(payload)
+
+            last = len(page) < page_limit
+            if not last:
+                tail = page[-1][key]
+                if tail is None:
+                    raise ConseilException(f'Cannot paginate by nullable column `{key}`')
+                # Rows sharing the last key value may continue on the next page,
+                # so hold them back and start the next page from that value inclusively
+                head = [x for x in page if x[key] != tail]
+                if head:
+                    page = head
+                    boundary = self._keyset(key, tail, direction, strict=False)
+                else:
+                    payload['predicates'] = predicates + [
+                        {'field': key, 'operation': 'eq', 'set': [tail], 'inverse': False}
+                    ]
+                    payload['limit'] = remaining
+                    page = self._fetch(payload)
+                    boundary = self._keyset(key, tail, direction)
+
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+            if page:
+                yield page
+            if last:
+                break
+
+    def iter_rows(self, page_size=1000):
+        """
+        Lazily iterate over all results, see `iter_pages`
+        :param page_size: number of rows per request
+        :return: generator
+        """
+        for page in self.iter_pages(page_size):
+            yield from page
+
+    def _with_attribute(self, attribute):
+        attributes = self['attributes'] or dict()
+        if attributes and attribute['attribute_id'] not in attributes:
+            return self._spawn(attributes={**attributes, attribute['attribute_id']: attribute})
+        return self
+
+    def join(self, other, on: tuple, how='inner', batch_size=500):
+        """
+        Join rows of another query on the client side (hash join), left side is streamed in batches
+        :param other: DataQuery to join
+        :param on: pair of attributes (left, right), e.g. (Operation.block_level, Block.level)
+        :param how: `inner` or `left`
+        :param batch_size: number of left rows per right side request
+        :return: generator of merged rows
+        """
+        if how not in ['inner', 'left']:
+            raise NotImplementedError(how)
+        left_attr, right_attr = on
+        left = self._with_attribute(left_attr)
+        right = other._with_attribute(right_attr)._spawn(limit=None)
+        return left._join(right, left_attr, right_attr, how, batch_size)
+
+    def _column(self, attribute):
+        # Result rows are keyed by the label the attribute is selected with, not the one it is passed with
+        attributes = self['attributes']
+        if not attributes:
+            return attribute['attribute_id']
+        attribute = attributes.get(attribute['attribute_id'], attribute)
+        return attribute['label'] or attribute['attribute_id']
+
+    def _join(self, right, left_attr, right_attr, how, batch_size):
+        left_key = self._column(left_attr)
+        right_key = right._column(right_attr)
+
+        rows = self.iter_rows(batch_size) if self['order_by'] else self.all(stream=True)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            keys = list(dict.fromkeys(x[left_key] for x in batch if x[left_key] is not None))
+            table = dict()
+            if keys:
+                for row in right.filter(right_attr.in_(*keys)).all():
+                    table.setdefault(row[right_key], []).append(row)
+
+            for row in batch:
+                matches = table.get(row[left_key]) if row[left_key] is not None else None
+                if not matches:
+                    if how == 'left':
+                        yield row
+                    continue
+                for match in matches:
+                    merged = dict(row)
+                    for key, value in match.items():
+                        merged[f'{right["entity_id"]}.{key}' if key in row else key] = value
+                    yield merged
+
+    async def all_async(self, output='json'):
+        """
+        Get all results without blocking the event loop
+        :param output: output format (json/csv/tuple/record), default is JSON
+        :return: list (json, tuple, record) or string (csv)
+        """
+        field_map, payload = self._prepare(output)
+        if self['typed']:
+            # Attributes metadata is requested synchronously, so the converter is compiled off the loop
+            await self._run_async(self._converter)
+        if self._oversized(payload) is not None or self['single_flight'] is not None:
+            data = await self._run_async(self._fetch, payload)
+        else:
+            text = self._cached(payload)
+            if text is not None:
+                data = self._loads(text, payload)
+            else:
+                res = await self._post_async(payload)
+                self._store(payload, res)
+                data = self._parse(res, payload)
+        if output in ROW_OUTPUTS:
+            return list(self._iter_tuples(self._finalize(data, dict(), 'json'), field_map, output))
+        return self._finalize(data, field_map, output)
+
+    async def one_async(self):
+        """
+        Get single result without blocking the event loop, fail if there are no or multiple records
+        :return: object
+        """
+        return self._one(await self.all_async())
+
+    async def one_or_none_async(self):
+        """
+        Get single result or None without blocking the event loop
+        :return: object or None
+        """
+        try:
+            return await self.one_async()
+        except ConseilException:
+            pass
+
+    async def scalar_async(self):
+        """
+        Get value of a single attribute without blocking the event loop
+        :return: scalar
+        """
+        return self._scalar(await self.one_async())
+
+    async def vector_async(self):
+        """
+        Get an array of values for a single column without blocking the event loop
+        :return: list
+        """
+        return self._vector(await self.all_async())
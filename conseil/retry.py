@@ -0,0 +1,131 @@
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+class RetryPolicy:
+    """
+    Capped exponential backoff with full jitter, honors `Retry-After` header
+    """
+
+    def __init__(self, retries=5, backoff=0.5, max_backoff=30.0, jitter=True,
+                 statuses=(429, 502, 503, 504), methods=('GET', 'POST'), retry_timeouts=True, max_retry_after=None):
+        """
+        :param retries: max number of retries (not counting the first attempt)
+        :param backoff: delay before the first retry in seconds, doubled every attempt
+        :param max_backoff: max delay in seconds
+        :param jitter: pick random delay in [0, backoff] to spread retries of concurrent clients
+        :param statuses: response status codes to retry
+        :param methods: HTTP methods to retry, Conseil data queries are idempotent so POST is retried too
+        :param retry_timeouts: retry connection errors and timeouts
+        :param max_retry_after: give up if `Retry-After` asks to wait longer than this number of seconds,
+        defaults to `max_backoff`
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = set(statuses)
+        self.methods = set(methods)
+        self.retry_timeouts = retry_timeouts
+        self.max_retry_after = max_backoff if max_retry_after is None else max_retry_after
+
+    def should_retry(self, method, attempt, response=None, error=None) -> bool:
+        """
+        :param method: HTTP method
+        :param attempt: number of the failed attempt, starting with 0
+        :param response: failed response
+        :param error: raised exception
+        :return: bool
+        """
+        if attempt >= self.retries or method not in self.methods:
+            return False
+        if error is not None:
+            return self.retry_timeouts and isinstance(error, (requests.ConnectionError, requests.Timeout))
+        if response is None or response.status_code not in self.statuses:
+            return False
+        # Waiting for too long would stall the caller and every thread sharing the rate limiter
+        retry_after = self.retry_after(response)
+        return retry_after is None or retry_after <= self.max_retry_after
+
+    @staticmethod
+    def retry_after(response) -> float:
+        """
+        Parse `Retry-After` header (seconds or HTTP date)
+        :param response: failed response
+        :return: seconds to wait or None
+        """
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+    def delay(self, attempt, response=None) -> float:
+        """
+        :param attempt: number of the failed attempt, starting with 0
+        :param response: failed response
+        :return: seconds to wait before the next attempt
+        """
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket, can be shared by several clients
+    """
+
+    def __init__(self, rate: float, burst=1):
+        """
+        :param rate: requests per second
+        :param burst: max number of requests sent without waiting after an idle period
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, block until it is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            # Tokens are reserved in advance (the balance goes negative),
+            # so waiting threads are spaced by 1 / rate and do not hold the lock
+            self._tokens -= 1
+            wait = self._updated + max(0.0, -self._tokens) / self.rate - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        Hold all subsequent requests, e.g. when the server asks to slow down
+        :param seconds: pause duration
+        """
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._updated:
+                self._tokens, self._updated = 1.0, until
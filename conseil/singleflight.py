@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Shares the result of a call between concurrent callers with the same key
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._futures = dict()
+
+    def do(self, key, func, *args):
+        """
+        Call function unless the same call is already in flight, otherwise wait for its result
+        :param key: hashable call identifier
+        :param func: function to call
+        :param args: function arguments
+        :return: tuple (result, shared)
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+    def stats(self) -> dict:
+        """
+        Get number of performed and shared calls
+        :return: dict
+        """
+        return {'calls': self.calls, 'shared': self.shared}
+
+
+single_flight = SingleFlight()
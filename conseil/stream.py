@@ -0,0 +1,177 @@
+import io
+import csv
+import codecs
+from json import JSONDecoder, JSONDecodeError
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+DELIMITERS = WHITESPACE + ',]'
+
+
+def iter_text(chunks, encoding='utf-8'):
+    """
+    Decode a stream of byte chunks, multibyte characters may be split between chunks
+    :param chunks: iterable of bytes (str chunks are passed through)
+    :param encoding: text encoding
+    :return: generator of str
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = chunk if isinstance(chunk, str) else decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_json_array(chunks, decoder: JSONDecoder = None):
+    """
+    Incrementally decode a JSON array, yielding items as soon as they are complete
+    :param chunks: iterable of bytes or str
+    :param decoder: custom JSONDecoder instance
+    :return: generator of array items
+    """
+    decoder = decoder or JSONDecoder()
+    chunks = iter_text(chunks)
+    buffer, pos = '', 0
+
+    def skip(expected=None):
+        # Move the cursor to the next significant character, pulling more data if needed
+        nonlocal buffer, pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                char = buffer[pos]
+                if expected and char not in expected:
+                    raise JSONDecodeError(f'Expecting one of `{expected}`', buffer, pos)
+                return char
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise JSONDecodeError('Unexpected end of stream', buffer, pos)
+            buffer, pos = chunk, 0
+
+    skip('[')
+    pos += 1
+    if skip() == ']':
+        return
+
+    while True:
+        skip()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                end = None
+            # A value not followed by a delimiter (e.g. a number) may be incomplete
+            if end is not None and end < len(buffer) and buffer[end] in DELIMITERS:
+                break
+            chunk = next(chunks, None)
+            if chunk is None:
+                if end is None:
+                    raise JSONDecodeError('Unexpected end of stream', buffer, pos)
+                break
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        pos = end
+        yield item
+
+        if skip(',]') == ']':
+            return
+        pos += 1
+
+
+def slice_json_array(text: str, limit=None, decoder: JSONDecoder = None):
+    """
+    Cut the first items of a JSON array, the rest of the text is not decoded; item literals are kept as is
+    :param text: JSON array
+    :param limit: max number of items, None means all
+    :param decoder: custom JSONDecoder instance
+    :return: tuple (JSON array, number of items)
+    """
+    decoder = decoder or JSONDecoder()
+
+    def skip(pos):
+        while pos < len(text) and text[pos] in WHITESPACE:
+            pos += 1
+        return pos
+
+    pos = skip(0)
+    if text[pos:pos + 1] != '[':
+        raise JSONDecodeError('Expecting `[`', text, pos)
+    end, pos, count = pos + 1, skip(pos + 1), 0
+    if text[pos:pos + 1] == ']':
+        return '[]', 0
+
+    while limit is None or count < limit:
+        _, end = decoder.raw_decode(text, pos)
+        count += 1
+        pos = skip(end)
+        char = text[pos:pos + 1]
+        if char == ']':
+            break
+        if char != ',':
+            raise JSONDecodeError('Expecting one of `,]`', text, pos)
+        pos = skip(pos + 1)
+
+    return text[:end] + ']', count
+
+
+def iter_csv(rows):
+    """
+    Serialize rows to CSV line by line, field names are taken from the first row
+    :param rows: iterable of dicts
+    :return: generator of str
+    """
+    fp = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(fp, fieldnames=row.keys())
+            writer.writeheader()
+        writer.writerow(row)
+        yield fp.getvalue()
+        fp.seek(0)
+        fp.truncate()
+
+
+def iter_lines(chunks):
+    """
+    Split text chunks into lines, line endings are preserved
+    :param chunks: iterable of str
+    :return: generator of str
+    """
+    tail = ''
+    for chunk in chunks:
+        lines = (tail + chunk).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if tail:
+        yield tail
+
+
+def rewrite_csv(chunks, field_map: dict):
+    """
+    Rename and drop CSV columns on the fly
+    :param chunks: iterable of CSV text chunks
+    :param field_map: {column: new name or False to drop}
+    :return: generator of str
+    """
+    fp = io.StringIO()
+    writer = csv.writer(fp)
+    indices = None
+    for row in csv.reader(iter_lines(chunks)):
+        if not row:
+            continue
+        if indices is None:
+            indices = [i for i, x in enumerate(row) if field_map.get(x) is not False]
+            row = [field_map.get(x) or x for x in row]
+        writer.writerow([row[i] for i in indices])
+        if fp.tell() >= CHUNK_SIZE:
+            yield fp.getvalue()
+            fp.seek(0)
+            fp.truncate()
+    if fp.tell():
+        yield fp.getvalue()
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from conseil.api import ConseilException
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# Conseil attribute `dataType` -> NumPy dtype
+NUMPY_TYPES = {
+    'Int': 'int64',
+    'Decimal': 'float64',
+    'Currency': 'float64',
+    'DateTime': 'datetime64[ms]',
+    'Boolean': 'bool'
+}
+
+# Conseil attribute `dataType` -> Arrow type factory
+ARROW_TYPES = {
+    'Int': lambda pa: pa.int64(),
+    'LargeInt': lambda pa: pa.decimal128(38, 0),
+    'Decimal': lambda pa: pa.float64(),
+    'Currency': lambda pa: pa.float64(),
+    'DateTime': lambda pa: pa.timestamp('ms'),
+    'Boolean': lambda pa: pa.bool_(),
+    'String': lambda pa: pa.string(),
+    'Hash': lambda pa: pa.string(),
+    'AccountAddress': lambda pa: pa.string()
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_int(value):
+    return value if type(value) is int else int(value)
+
+
+def to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    # Shortest repr of a float is the literal it was decoded from (up to 17 significant digits)
+    return Decimal(repr(value) if isinstance(value, float) else value)
+
+
+def to_datetime(value):
+    if isinstance(value, (str, datetime)):
+        return value
+    return EPOCH + timedelta(milliseconds=value)
+
+
+# Conseil attribute `dataType` -> Python converter
+PYTHON_TYPES = {
+    'Int': to_int,
+    'LargeInt': to_int,
+    'Decimal': to_decimal,
+    'Currency': to_decimal,
+    'DateTime': to_datetime
+}
+
+
+def python_converter(types: dict):
+    """
+    Compile row converter from attribute data types
+    :param types: {field name: Conseil data type}
+    :return: function converting a row (dict) in place, or None if there is nothing to convert
+    """
+    converters = [(name, PYTHON_TYPES[x]) for name, x in types.items() if x in PYTHON_TYPES]
+    if not converters:
+        return None
+
+    def convert(row: dict):
+        for name, func in converters:
+            value = row.get(name)
+            if value is not None:
+                row[name] = func(value)
+        return row
+
+    return convert
+
+
+def require(module, name):
+    if module is None:
+        raise ConseilException(f'`{name}` is not installed, run `pip install {name}`')
+    return module
+
+
+def numpy_array(values: list, data_type=None):
+    """
+    Convert column values to NumPy array according to the attribute data type
+    :param values: list of decoded JSON values
+    :param data_type: Conseil attribute data type
+    :return: numpy.ndarray
+    """
+    np = require(numpy, 'numpy')
+    dtype = NUMPY_TYPES.get(data_type, 'object')
+    if dtype == 'int64':
+        try:
+            return np.array(values, dtype=dtype)
+        except (TypeError, OverflowError):
+            # Nulls (and too large values) do not fit into int64
+            dtype = 'float64' if all(map(lambda x: x is None or abs(x) < 2 ** 53, values)) else 'object'
+    elif dtype == 'bool' and None in values:
+        dtype = 'object'
+    return np.array(values, dtype=dtype)
+
+
+def arrow_schema(rows: list, types: dict):
+    """
+    Build Arrow schema from attribute data types, unknown types are inferred from the rows
+    :param rows: sample rows (e.g. the first page)
+    :param types: {field name: Conseil data type}
+    :return: pyarrow.Schema
+    """
+    pa = require(pyarrow, 'pyarrow')
+    names = list(rows[0].keys()) if rows else list(types)
+    fields = []
+    for name in names:
+        factory = ARROW_TYPES.get(types.get(name))
+        if factory:
+            arrow_type = factory(pa)
+        else:
+            arrow_type = pa.array([x.get(name) for x in rows]).type
+            if arrow_type == pa.null():
+                arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def arrow_batch(rows: list, schema):
+    """
+    Convert rows to Arrow record batch
+    :param rows: list of dicts
+    :param schema: pyarrow.Schema
+    :return: pyarrow.RecordBatch
+    """
+    pa = require(pyarrow, 'pyarrow')
+    arrays = [
+        pa.array([x.get(field.name) for x in rows], type=field.type)
+        for field in schema
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
@@ -1,7 +1,12 @@
+import io
+import csv
+from json import loads
+
 from requests import Response
 from unittest import TestCase
 from unittest.mock import MagicMock
 
+from conseil.codec import encode_json
 from conseil.core import ConseilClient
 from conseil.query import DataQuery
 
@@ -32,3 +37,92 @@ class ConseilCase(TestCase):
 
     def assertLastGetPathEquals(self, path):
         self.assertEqual(path, self.api.get.call_args_list[-1][0][0])
+
+
+def _match(row, predicate):
+    value = row.get(predicate['field'])
+    values = predicate['set']
+    operation = predicate['operation']
+    if operation == 'isnull':
+        res = value is None
+    elif value is None:
+        res = False
+    elif operation == 'eq':
+        res = value == values[0]
+    elif operation == 'in':
+        res = value in values
+    elif operation == 'between':
+        res = values[0] <= value <= values[1]
+    elif operation == 'gt':
+        res = value > values[0]
+    elif operation == 'lt':
+        res = value < values[0]
+    elif operation == 'startsWith':
+        res = value.startswith(values[0])
+    else:
+        raise NotImplementedError(operation)
+    return res != predicate['inverse']
+
+
+def _aggregate(rows, fields, aggregation):
+    functions = {
+        'sum': sum,
+        'count': len,
+        'min': min,
+        'max': max,
+        'avg': lambda x: sum(x) / len(x)
+    }
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row[f] for f in fields), []).append(row)
+
+    res = []
+    for key, group in groups.items():
+        item = dict(zip(fields, key))
+        for agg in aggregation:
+            item[f'{agg["function"]}_{agg["field"]}'] = functions[agg['function']]([x[agg['field']] for x in group])
+        if all(_match(item, agg['predicate']) for agg in aggregation if agg.get('predicate')):
+            res.append(item)
+    return res
+
+
+class MockDataApi:
+    """
+    Evaluates Conseil queries against an in-memory table
+    """
+    host = 'http://localhost'
+    version = 2
+
+    def __init__(self, rows, metadata=None):
+        self.rows = rows
+        self.metadata = metadata or dict()
+        self.get = MagicMock(side_effect=lambda path: MagicMock(json=MagicMock(return_value=self.metadata.get(path, []))))
+        self.post = MagicMock(side_effect=self._post)
+
+    def _post(self, path, json, **kwargs):
+        rows = [x for x in self.rows if all(_match(x, p) for p in json['predicates'])]
+        if json['aggregation']:
+            rows = _aggregate(rows, json['fields'], json['aggregation'])
+        # Like the server, rows are sorted before projection, so the sort column may be not selected
+        for order in reversed(json['orderBy']):
+            rows.sort(key=lambda x: x[order['field']], reverse=order['direction'] == 'desc')
+        if json['fields'] and not json['aggregation']:
+            rows = [{k: x[k] for k in json['fields']} for x in rows]
+        if json['limit'] is not None:
+            rows = rows[:json['limit']]
+
+        if json.get('output') == 'csv':
+            fp = io.StringIO()
+            writer = csv.DictWriter(fp, fieldnames=rows[0].keys() if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+            body = fp.getvalue().encode()
+        else:
+            body = encode_json(rows).encode()
+        response = MagicMock()
+        response.json.side_effect = lambda **kwargs: loads(body, **kwargs)
+        response.text = body.decode()
+        response.iter_content.side_effect = lambda chunk_size: (
+            body[i:i + 7] for i in range(0, len(body), 7)
+        )
+        return response
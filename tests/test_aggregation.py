@@ -1,4 +1,6 @@
+from conseil.aggregate import evaluate, partial_payload
 from conseil.api import ConseilException
+from conseil.core import not_
 from tests.mock_api import ConseilCase
 
 
@@ -69,3 +71,31 @@ class AggregationTest(ConseilCase):
 
     def test_multiple_aggregation(self):
         pass
+
+
+class ClientAggregationTest(ConseilCase):
+
+    def test_evaluate(self):
+        c = self.conseil.tezos.alphanet.accounts
+        self.assertTrue(evaluate(c.balance.between(1, 3), 3))
+        self.assertFalse(evaluate(not_(c.balance.between(1, 3)), 2))
+        self.assertTrue(evaluate(c.balance >= 2, 2))
+        self.assertFalse(evaluate(c.balance > 2, None))
+        self.assertTrue(evaluate(c.script.is_(None), None))
+        self.assertTrue(evaluate(c.account_id.notin_('a', 'b'), 'c'))
+        self.assertTrue(evaluate(c.account_id.like('z1'), 'tz1abc'))
+        self.assertTrue(evaluate(c.account_id.endswith('bc'), 'tz1abc'))
+
+    def test_partial_payload(self):
+        c = self.conseil.tezos.alphanet.accounts
+        query = c.query(c.manager, c.balance.avg(), c.balance.sum()) \
+            .having(c.balance.avg() > 10) \
+            .order_by(c.balance.avg().desc()) \
+            .limit(5)
+        payload = partial_payload(query.payload())
+        self.assertListEqual([
+            {'field': 'balance', 'function': 'sum'},
+            {'field': 'balance', 'function': 'count'}
+        ], payload['aggregation'])
+        self.assertListEqual([], payload['orderBy'])
+        self.assertIsNone(payload['limit'])
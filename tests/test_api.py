@@ -0,0 +1,57 @@
+from decimal import Decimal
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from conseil.api import ConseilApi, ConseilException, PooledTransport
+from conseil.codec import encode_json
+
+
+class ApiTest(TestCase):
+
+    def setUp(self):
+        self.transport = MagicMock()
+        self.transport.request.return_value = MagicMock(status_code=200)
+        self.api = ConseilApi('key', 'http://localhost', 2, transport=self.transport)
+
+    def test_request(self):
+        self.api.post('data/tezos/alphanet/accounts', {'fields': []})
+        kwargs = self.transport.request.call_args[1]
+        self.assertEqual('POST', kwargs['method'])
+        self.assertEqual('http://localhost/v2/data/tezos/alphanet/accounts', kwargs['url'])
+        self.assertDictEqual({'apiKey': 'key', 'Content-Type': 'application/json'}, kwargs['headers'])
+        self.assertEqual(b'{"fields":[]}', kwargs['data'])
+
+    def test_decimal_body(self):
+        self.api.post('data/tezos/alphanet/accounts', {'set': [Decimal('0.1'), Decimal('12345678901234567890.123')]})
+        self.assertEqual(b'{"set":[0.1,12345678901234567890.123]}', self.transport.request.call_args[1]['data'])
+        self.assertRaises(ValueError, encode_json, Decimal('NaN'))
+
+    def test_error(self):
+        self.transport.request.return_value = MagicMock(status_code=500, text='error')
+        self.assertRaises(ConseilException, self.api.get, 'metadata/platforms')
+
+    def test_default_transport(self):
+        api = ConseilApi('key', 'http://localhost', 2)
+        self.assertIsInstance(api.transport, PooledTransport)
+
+
+class PooledTransportTest(TestCase):
+
+    def test_session_per_thread(self):
+        transport = PooledTransport(pool_maxsize=4)
+        sessions = []
+        thread = Thread(target=lambda: sessions.append(transport.session))
+        thread.start()
+        thread.join()
+
+        self.assertIs(transport.session, transport.session)
+        self.assertIsNot(transport.session, sessions[0])
+        self.assertIs(transport.session.get_adapter('https://x'), sessions[0].get_adapter('https://x'))
+
+    def test_no_keep_alive(self):
+        transport = PooledTransport(keep_alive=False)
+        transport._local.session = MagicMock()
+        transport.request('GET', 'http://localhost', headers={'apiKey': 'key'})
+        headers = transport.session.request.call_args[1]['headers']
+        self.assertDictEqual({'apiKey': 'key', 'Connection': 'close'}, headers)
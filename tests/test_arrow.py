@@ -0,0 +1,61 @@
+import os
+import tempfile
+from unittest import TestCase, skipUnless
+
+from conseil.core import ConseilClient
+from conseil.types import pyarrow
+from tests.mock_api import MockDataApi
+from tests.test_columnar import ATTRIBUTES
+
+
+@skipUnless(pyarrow, 'pyarrow is not installed')
+class ArrowTest(TestCase):
+
+    def setUp(self):
+        rows = [
+            {'level': i, 'timestamp': 1554076800000 + i * 60000, 'fee': i * 0.5, 'kind': 'transaction'}
+            for i in range(25)
+        ]
+        self.api = MockDataApi(rows, metadata={'metadata/tezos/alphanet/operations/attributes': ATTRIBUTES})
+        self.Operation = ConseilClient(self.api).tezos.alphanet.operations
+
+    def test_to_arrow(self):
+        table = self.Operation.query().order_by(self.Operation.level).to_arrow(page_size=10)
+        self.assertEqual(25, table.num_rows)
+        self.assertEqual('int64', str(table.schema.field('level').type))
+        self.assertEqual('timestamp[ms]', str(table.schema.field('timestamp').type))
+        self.assertEqual('string', str(table.schema.field('kind').type))
+        self.assertEqual(3, self.api.post.call_count)
+
+    def test_to_parquet(self):
+        import pyarrow.parquet as pq
+
+        Operation = self.Operation
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'operations.parquet')
+            count = Operation.query(Operation.level, Operation.fee.label('f')).to_parquet(path, page_size=10)
+            table = pq.read_table(path)
+
+        self.assertEqual(25, count)
+        self.assertListEqual(['level', 'f'], table.schema.names)
+        self.assertEqual(12.0, table.column('f')[24].as_py())
+
+    def test_typed(self):
+        import pyarrow.parquet as pq
+
+        query = self.Operation.query().order_by(self.Operation.level).typed()
+        table = query.to_arrow(page_size=10)
+        self.assertEqual(table, self.Operation.query().order_by(self.Operation.level).to_arrow(page_size=10))
+        self.assertEqual('double', str(table.schema.field('fee').type))
+        self.assertEqual(12.0, table.column('fee')[24].as_py())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'operations.parquet')
+            self.assertEqual(25, query.to_parquet(path, page_size=10))
+            self.assertEqual(table, pq.read_table(path))
+
+    def test_empty(self):
+        Operation = self.Operation
+        table = Operation.query(Operation.level).filter(Operation.level > 100).to_arrow()
+        self.assertEqual(0, table.num_rows)
+        self.assertListEqual(['level'], table.schema.names)
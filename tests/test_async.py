@@ -0,0 +1,106 @@
+import json
+import time
+import asyncio
+from threading import Lock, current_thread, main_thread
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from conseil.api import AsyncConseilApi
+from conseil.core import ConseilClient, ConseilException
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class AsyncQueryTest(TestCase):
+
+    def setUp(self):
+        self.response = MagicMock(status_code=200)
+        self.response.content = b'[{"account_id": "tzkt"}]'
+        self.transport = MagicMock()
+        self.transport.request.return_value = self.response
+        self.api = AsyncConseilApi('key', 'http://localhost', 2, transport=self.transport, concurrency=2)
+        self.c = ConseilClient(self.api).tezos.alphanet
+
+    def test_all_async(self):
+        query = self.c.accounts.query(self.c.accounts.account_id.label('address'))
+        self.assertListEqual([{'address': 'tzkt'}], run(query.all_async()))
+        self.assertDictEqual(query.payload(), json.loads(self.transport.request.call_args[1]['data']))
+
+    def test_one_scalar_vector_async(self):
+        query = self.c.accounts.account_id.query()
+        self.assertDictEqual({'account_id': 'tzkt'}, run(query.one_async()))
+        self.assertEqual('tzkt', run(query.scalar_async()))
+        self.assertListEqual(['tzkt'], run(query.vector_async()))
+
+        self.response.content = b'[]'
+        self.assertRaises(ConseilException, run, query.one_async())
+        self.assertIsNone(run(query.one_or_none_async()))
+
+    def test_concurrency_limit(self):
+        lock = Lock()
+        state = {'active': 0, 'max': 0}
+
+        def request(**kwargs):
+            with lock:
+                state['active'] += 1
+                state['max'] = max(state['max'], state['active'])
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+            return self.response
+
+        self.transport.request.side_effect = request
+        query = self.c.accounts.query()
+
+        async def main():
+            return await asyncio.gather(*[query.all_async() for _ in range(8)])
+
+        self.assertEqual(8, len(run(main())))
+        self.assertEqual(2, state['max'])
+
+    def test_chunked_concurrency_limit(self):
+        lock = Lock()
+        state = {'active': 0, 'max': 0}
+
+        def request(**kwargs):
+            with lock:
+                state['active'] += 1
+                state['max'] = max(state['max'], state['active'])
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+            return self.response
+
+        self.transport.request.side_effect = request
+        accounts = self.c.accounts
+        query = accounts.query().filter(accounts.account_id.in_(*map(str, range(40)))).chunked(5, max_workers=8)
+
+        self.assertEqual(8, len(run(query.all_async())))
+        self.assertEqual(8, self.transport.request.call_count)
+        self.assertEqual(2, state['max'])
+
+    def test_typed_metadata_off_loop(self):
+        threads = []
+
+        def request(method, **kwargs):
+            if method == 'GET':
+                threads.append(current_thread())
+            return self.response
+
+        self.transport.request.side_effect = request
+        run(self.c.accounts.query().typed().all_async())
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(main_thread(), threads[0])
+
+    def test_sync_api_fallback(self):
+        api = MagicMock()
+        api.post.return_value = self.response
+        self.response.json.return_value = [{'account_id': 'tzkt'}]
+        query = ConseilClient(api).tezos.alphanet.accounts.query()
+        self.assertListEqual([{'account_id': 'tzkt'}], run(query.all_async()))
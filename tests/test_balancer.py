@@ -0,0 +1,85 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from conseil.api import ConseilException
+from conseil.balancer import BalancedConseilApi, is_failure
+from conseil.core import ConseilClient
+
+HOSTS = ['http://a', 'http://b', 'http://c']
+
+
+class BalancerTest(TestCase):
+
+    def setUp(self):
+        self.behavior = dict()
+        self.transport = MagicMock()
+        self.transport.request.side_effect = self._request
+
+    def _request(self, method, url, **kwargs):
+        host = url.split('/v2/')[0]
+        delay, status = self.behavior.get(host, (0, 200))
+        if delay:
+            time.sleep(delay)
+        if status is None:
+            raise ConnectionError(host)
+        return MagicMock(status_code=status, content=b'[]', text='', host=host)
+
+    def api(self, **kwargs):
+        return BalancedConseilApi('key', HOSTS, 2, transport=self.transport, **kwargs)
+
+    def hosts(self):
+        return [x[1]['url'].split('/v2/')[0] for x in self.transport.request.call_args_list]
+
+    def test_spread(self):
+        api = self.api()
+        for _ in range(30):
+            api.get('metadata/platforms')
+        self.assertSetEqual(set(HOSTS), set(self.hosts()))
+        self.assertTrue(all(x['latency'] is not None for x in api.stats()))
+
+    def test_failover_and_ejection(self):
+        self.behavior['http://a'] = (0, 503)
+        api = self.api(max_failures=2, eject_for=60)
+        for _ in range(20):
+            self.assertEqual(200, api.get('metadata/platforms').status_code)
+
+        stats = {x['host']: x for x in api.stats()}
+        self.assertTrue(stats['http://a']['ejected'])
+        self.assertEqual(2, self.hosts().count('http://a'))
+
+    def test_client_error(self):
+        self.behavior.update({x: (0, 400) for x in HOSTS})
+        api = self.api(max_failures=1)
+        self.assertRaises(ConseilException, api.post, 'data/tezos/mainnet/blocks', {})
+        self.assertEqual(1, self.transport.request.call_count)
+        self.assertFalse(any(x['ejected'] for x in api.stats()))
+
+    def test_all_failed(self):
+        self.behavior.update({x: (0, None) for x in HOSTS})
+        api = self.api()
+        self.assertRaises(ConnectionError, api.get, 'metadata/platforms')
+        self.assertEqual(3, self.transport.request.call_count)
+
+    def test_hedging(self):
+        self.behavior['http://a'] = (0.5, 200)
+        api = BalancedConseilApi('key', HOSTS[:2], 2, transport=self.transport, hedge_after=0.01)
+        api.endpoints[1].latency = 1.0  # make sure the slow replica is picked first
+
+        start = time.monotonic()
+        response = api.get('metadata/platforms')
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual('http://b', response.host)
+        self.assertListEqual(['http://a', 'http://b'], sorted(self.hosts()))
+        api.close()
+
+    def test_query(self):
+        api = self.api()
+        self.assertListEqual([], ConseilClient(api).tezos.mainnet.blocks.query().all())
+        self.assertTrue(self.transport.request.called)
+
+    def test_is_failure(self):
+        self.assertTrue(is_failure(ConnectionError()))
+        self.assertTrue(is_failure(ConseilException('[503]', status_code=503)))
+        self.assertTrue(is_failure(ConseilException('[429]', status_code=429)))
+        self.assertFalse(is_failure(ConseilException('[404]', status_code=404)))
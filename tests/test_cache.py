@@ -0,0 +1,142 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from conseil.cache import DiskCache, MemoryCache, cache_key
+from conseil.core import ConseilClient
+from tests.mock_api import MockDataApi
+
+URL = 'http://localhost/v2/data/tezos/alphanet/accounts'
+
+
+class DiskCacheTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'cache.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key(self):
+        self.assertEqual(cache_key(URL, {'a': 1, 'b': [1, 2]}), cache_key(URL, {'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(cache_key(URL, {'a': 1}), cache_key(URL + 'x', {'a': 1}))
+
+    def test_get_set(self):
+        cache = DiskCache(self.filename)
+        self.assertIsNone(cache.get(URL, {'limit': 1}))
+        cache.set(URL, {'limit': 1}, '[{"account_id":"tzkt"}]')
+        self.assertEqual('[{"account_id":"tzkt"}]', cache.get(URL, {'limit': 1}))
+        self.assertEqual('[{"account_id":"tzkt"}]', DiskCache(self.filename).get(URL, {'limit': 1}))
+
+    def test_entity_ttl(self):
+        cache = DiskCache(self.filename, ttl=100, entity_ttl={'blocks': 10, 'rolls': 0})
+        blocks = URL.replace('accounts', 'blocks')
+        rolls = URL.replace('accounts', 'rolls')
+        with patch('conseil.cache.time.time', return_value=1000):
+            cache.set(URL, {}, '[1]')
+            cache.set(blocks, {}, '[2]')
+            cache.set(rolls, {}, '[3]')
+        with patch('conseil.cache.time.time', return_value=1050):
+            self.assertEqual('[1]', cache.get(URL, {}))
+            self.assertIsNone(cache.get(blocks, {}))
+            self.assertIsNone(cache.get(rolls, {}))
+
+    def test_lru_eviction(self):
+        cache = DiskCache(self.filename, max_size=300)
+        data = ''.join(os.urandom(32).hex() for _ in range(3))
+        with patch('conseil.cache.time.time', side_effect=range(100)):
+            cache.set(URL, {'limit': 1}, data)
+            cache.set(URL, {'limit': 2}, data)
+            cache.get(URL, {'limit': 1})
+            cache.set(URL, {'limit': 3}, data)
+            self.assertIsNotNone(cache.get(URL, {'limit': 1}))
+            self.assertIsNone(cache.get(URL, {'limit': 2}))
+            self.assertIsNotNone(cache.get(URL, {'limit': 3}))
+
+    def test_query(self):
+        api = MockDataApi([{'account_id': 'tzkt', 'balance': 1}])
+        Account = ConseilClient(api, cache=DiskCache(self.filename)).tezos.alphanet.accounts
+
+        query = Account.query(Account.account_id.label('address'))
+        self.assertListEqual([{'address': 'tzkt'}], query.all())
+        self.assertListEqual([{'address': 'tzkt'}], query.all())
+        self.assertListEqual([{'address': 'tzkt'}], list(query.all(stream=True)))
+        self.assertEqual(1, api.post.call_count)
+
+        Account.query().limit(1).all()
+        self.assertEqual(2, api.post.call_count)
+
+
+class MemoryCacheTest(TestCase):
+
+    def setUp(self):
+        self.rows = [{'account_id': f'tz{i}', 'balance': 100 - i} for i in range(50)]
+        self.api = MockDataApi(self.rows)
+        self.cache = MemoryCache()
+        self.Account = ConseilClient(self.api, cache=self.cache).tezos.alphanet.accounts
+
+    def query(self, limit=None):
+        query = self.Account.query().order_by(self.Account.balance.desc())
+        return query if limit is None else query.limit(limit)
+
+    def test_subsumption(self):
+        self.assertListEqual(self.rows[:20], self.query(20).all())
+        self.assertListEqual(self.rows[:5], self.query(5).all())
+        self.assertListEqual(self.rows[:20], self.query(20).all())
+        self.assertEqual(1, self.api.post.call_count)
+        self.assertDictEqual(
+            {'hits': 1, 'subsumed': 1, 'misses': 1},
+            {k: v for k, v in self.cache.stats().items() if k in ['hits', 'subsumed', 'misses']}
+        )
+
+        self.assertListEqual(self.rows[:30], self.query(30).all())
+        self.assertEqual(2, self.api.post.call_count)
+        self.assertEqual(1, self.cache.stats()['entries'])  # limit 20 is superseded
+
+        self.assertListEqual(self.rows[:10], list(self.query(10).all(stream=True)))
+        self.assertEqual(2, self.api.post.call_count)
+
+    def test_different_query(self):
+        self.query(20).all()
+        self.Account.query().order_by(self.Account.balance).limit(5).all()
+        query = self.Account.query(self.Account.balance, self.Account.account_id)
+        query.order_by(self.Account.balance.desc()).limit(5).all()
+        self.query(5).all(output='csv')
+        self.assertEqual(4, self.api.post.call_count)
+        self.assertEqual(0, self.cache.stats()['subsumed'])
+
+    def test_complete_result(self):
+        self.assertEqual(50, len(self.query(100).all()))
+        self.assertEqual(50, len(self.query(200).all()))
+        self.assertEqual(50, len(self.query().all()))
+        self.assertEqual(1, self.api.post.call_count)
+
+        self.query().all()
+        self.assertListEqual(self.rows[:50], self.query(60).all())
+        self.assertEqual(1, self.api.post.call_count)
+
+    def test_eviction(self):
+        data = '[' + ','.join(['"' + 'x' * 100 + '"'] * 10) + ']'
+        cache = MemoryCache(max_size=len(data) * 2 + 200)
+        cache.set(URL, {'limit': 1}, data)
+        cache.set(URL + '/a', {'limit': 1}, data)
+        cache.get(URL, {'limit': 1})
+        cache.set(URL + '/b', {'limit': 1}, data)
+        self.assertIsNotNone(cache.get(URL, {'limit': 1}))
+        self.assertIsNone(cache.get(URL + '/a', {'limit': 1}))
+        self.assertEqual(1, cache.stats()['evictions'])
+        self.assertLessEqual(cache.stats()['size'], cache.max_size)
+
+        cache.set(URL, {'limit': 2}, data * 10)
+        self.assertIsNone(cache.get(URL, {'limit': 2}))
+
+    def test_ttl(self):
+        cache = MemoryCache(ttl=10)
+        with patch('conseil.cache.time.time', return_value=1000):
+            cache.set(URL, {'limit': 10, 'output': 'json'}, '[1,2,3]')
+            self.assertEqual('[1,2]', cache.get(URL, {'limit': 2, 'output': 'json'}))
+        with patch('conseil.cache.time.time', return_value=1050):
+            self.assertIsNone(cache.get(URL, {'limit': 2, 'output': 'json'}))
+        self.assertEqual(0, cache.stats()['entries'])
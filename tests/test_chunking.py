@@ -0,0 +1,102 @@
+from conseil.core import ConseilClient, ConseilException
+from tests.mock_api import ConseilCase, MockDataApi
+
+
+class ChunkingTest(ConseilCase):
+
+    def setUp(self):
+        super(ChunkingTest, self).setUp()
+        self.rows = [
+            {'account_id': f'tz{i}', 'balance': (i * 37) % 101, 'manager': f'tz{i % 10}'}
+            for i in range(300)
+        ]
+        self.api = MockDataApi(self.rows)
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+        self.addresses = [f'tz{i}' for i in range(0, 600, 2)]
+
+    def payloads(self):
+        return [x[1]['json'] for x in self.api.post.call_args_list]
+
+    def test_in(self):
+        Account = self.Account
+        query = Account.query(Account.account_id, Account.balance) \
+            .filter(Account.account_id.in_(*self.addresses, *self.addresses[:10])) \
+            .order_by(Account.balance.desc(), Account.account_id) \
+            .limit(40)
+
+        expected = query.all()
+        self.api.post.reset_mock()
+        res = query.chunked(50).all()
+
+        self.assertListEqual(expected, res)
+        self.assertEqual(6, self.api.post.call_count)
+        self.assertTrue(all(len(x['predicates'][0]['set']) <= 50 for x in self.payloads()))
+
+    def test_in_unselected_order(self):
+        Account = self.Account
+        query = Account.query(Account.account_id) \
+            .filter(Account.account_id.in_(*self.addresses)) \
+            .order_by(Account.balance.desc(), Account.account_id) \
+            .limit(5)
+
+        expected = query.all()
+        res = query.chunked(10).all()
+        self.assertListEqual(expected, res)
+        self.assertListEqual(['account_id'], list(res[0]))
+
+    def test_notin(self):
+        Account = self.Account
+        query = Account.query(Account.balance.label('b')) \
+            .filter(Account.account_id.notin_(*self.addresses)) \
+            .order_by(Account.balance) \
+            .limit(20)
+
+        expected = query.all()
+        self.api.post.reset_mock()
+        res = query.chunked(100).all()
+
+        self.assertListEqual(expected, res)
+        self.assertEqual(1, self.api.post.call_count)
+        self.assertEqual(100, len(self.payloads()[0]['predicates'][0]['set']))
+
+    def test_notin_paged(self):
+        Account = self.Account
+        # Sets are sorted, so the server excludes unused values and the rest is filtered out on the client
+        managers = [f'tz{i}' for i in range(8)] + [f'a{i}' for i in range(10)]
+        query = Account.query(Account.account_id, Account.balance) \
+            .filter(Account.manager.notin_(*managers)) \
+            .order_by(Account.balance.desc(), Account.account_id) \
+            .limit(30)
+
+        expected = query.all()
+        self.api.post.reset_mock()
+        res = query.chunked(10).all()
+
+        self.assertListEqual(expected, res)
+        self.assertEqual(30, len(res))
+        self.assertGreater(self.api.post.call_count, 1)
+        self.assertTrue(all(x['limit'] is not None for x in self.payloads()))
+
+    def test_notin_unsupported(self):
+        Account = self.Account
+        aggregated = Account.query(Account.balance.sum()).filter(Account.account_id.notin_(*self.addresses))
+        self.assertRaises(ConseilException, aggregated.chunked(50).all)
+        self.assertEqual(1, len(aggregated.chunked(1000).all()))
+
+        unordered = Account.query().filter(Account.account_id.notin_(*self.addresses)).limit(10)
+        self.assertRaises(ConseilException, unordered.chunked(50).all)
+        self.assertEqual(150, len(unordered.limit(None).chunked(50).all()))
+
+    def test_aggregated(self):
+        Account = self.Account
+        query = Account.query(Account.manager, Account.balance.sum(), Account.balance.avg()) \
+            .filter(Account.account_id.in_(*self.addresses)) \
+            .order_by(Account.balance.sum().desc())
+
+        self.assertListEqual(query.all(), query.chunked(30).all(output='json'))
+
+    def test_csv(self):
+        Account = self.Account
+        query = Account.query(Account.account_id).filter(Account.account_id.in_(*self.addresses[:5]))
+        self.assertEqual(query.all(output='csv'), query.chunked(2).all(output='csv'))
+        self.assertEqual(query.all(output='csv'), ''.join(query.chunked(2).all(output='csv', stream=True)))
@@ -0,0 +1,61 @@
+import json
+from decimal import Decimal
+from unittest import TestCase, skipUnless
+from unittest.mock import MagicMock
+
+from conseil.api import ConseilApi
+from conseil.codec import JsonCodec, OrjsonCodec, UjsonCodec, default_codec, orjson, ujson
+
+PAYLOAD = {
+    'fields': ['balance'],
+    'predicates': [{'field': 'balance', 'operation': 'gt', 'set': [Decimal('0.1')], 'precision': 1}],
+    'limit': 2 ** 70
+}
+BODY = b'[{"level":1,"amount":123456789012345678901234567890,"fee":0.1,"kind":"transaction"}]'
+
+
+class CodecMixin:
+    codec = None
+
+    def test_dumps(self):
+        data = self.codec.dumps({'fields': [], 'limit': 10, 'kind': 'transaction'})
+        self.assertDictEqual({'fields': [], 'limit': 10, 'kind': 'transaction'}, json.loads(data))
+
+    def test_dumps_exact(self):
+        data = self.codec.dumps(PAYLOAD)
+        self.assertIn(b'[0.1]', data)
+        self.assertEqual(2 ** 70, json.loads(data)['limit'])
+
+    def test_loads_exact(self):
+        self.assertEqual(123456789012345678901234567890, self.codec.loads(BODY)[0]['amount'])
+        self.assertEqual(Decimal('0.1'), self.codec.loads(BODY, parse_float=Decimal)[0]['fee'])
+        self.assertListEqual([{'kind': 'transaction'}], self.codec.loads('[{"kind":"transaction"}]'))
+
+
+class JsonCodecTest(CodecMixin, TestCase):
+    codec = JsonCodec()
+
+
+@skipUnless(orjson, 'orjson is not installed')
+class OrjsonCodecTest(CodecMixin, TestCase):
+    codec = OrjsonCodec()
+
+
+@skipUnless(ujson, 'ujson is not installed')
+class UjsonCodecTest(CodecMixin, TestCase):
+    codec = UjsonCodec()
+
+
+class ApiCodecTest(TestCase):
+
+    def test_default(self):
+        self.assertIsInstance(ConseilApi('key', 'http://localhost', 2).codec, type(default_codec()))
+
+    def test_response(self):
+        transport = MagicMock()
+        transport.request.return_value = MagicMock(status_code=200, content=BODY)
+        api = ConseilApi('key', 'http://localhost', 2, transport=transport, codec=JsonCodec())
+        res = api.post('data/tezos/mainnet/operations', PAYLOAD)
+        self.assertEqual(123456789012345678901234567890, res.json()[0]['amount'])
+        self.assertEqual(Decimal('0.1'), res.json(parse_float=Decimal)[0]['fee'])
+        self.assertIn(b'[0.1]', transport.request.call_args[1]['data'])
@@ -0,0 +1,60 @@
+import warnings
+from unittest import TestCase, skipUnless
+
+from conseil.core import ConseilClient
+from conseil.types import numpy
+from tests.mock_api import MockDataApi
+
+ATTRIBUTES = [
+    {'name': 'level', 'dataType': 'Int'},
+    {'name': 'timestamp', 'dataType': 'DateTime'},
+    {'name': 'fee', 'dataType': 'Decimal'},
+    {'name': 'kind', 'dataType': 'String'},
+]
+
+
+@skipUnless(numpy, 'numpy is not installed')
+class ColumnarTest(TestCase):
+
+    def setUp(self):
+        rows = [
+            {'level': i, 'timestamp': 1554076800000 + i * 60000, 'fee': i * 0.5, 'kind': 'transaction'}
+            for i in range(10)
+        ]
+        rows.append({'level': 10, 'timestamp': None, 'fee': None, 'kind': None})
+        self.api = MockDataApi(rows, metadata={'metadata/tezos/alphanet/operations/attributes': ATTRIBUTES})
+        self.Operation = ConseilClient(self.api).tezos.alphanet.operations
+
+    def test_columns(self):
+        res = self.Operation.query().columns()
+        self.assertEqual('int64', res['level'].dtype)
+        self.assertEqual('datetime64[ms]', res['timestamp'].dtype)
+        self.assertEqual('float64', res['fee'].dtype)
+        self.assertEqual('object', res['kind'].dtype)
+        self.assertEqual(numpy.datetime64('2019-04-01T00:01:00'), res['timestamp'][1])
+        self.assertTrue(numpy.isnat(res['timestamp'][10]))
+        self.assertTrue(numpy.isnan(res['fee'][10]))
+
+    def test_typed_columns(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            res = self.Operation.query().typed().columns()
+        self.assertEqual('datetime64[ms]', res['timestamp'].dtype)
+        self.assertEqual('float64', res['fee'].dtype)
+        self.assertEqual(numpy.datetime64('2019-04-01T00:01:00'), res['timestamp'][1])
+        self.assertEqual(4.5, res['fee'][9])
+
+    def test_aggregated_columns(self):
+        Operation = self.Operation
+        res = Operation.query(Operation.kind, Operation.level.count(), Operation.level.max().label('top')) \
+            .filter(Operation.fee.isnot(None)) \
+            .columns()
+        self.assertEqual('int64', res['count_level'].dtype)
+        self.assertEqual('int64', res['top'].dtype)
+        self.assertListEqual([9], res['top'].tolist())
+
+    def test_empty(self):
+        Operation = self.Operation
+        res = Operation.query(Operation.level, Operation.fee).filter(Operation.level > 100).columns()
+        self.assertEqual(0, len(res['level']))
+        self.assertEqual('float64', res['fee'].dtype)
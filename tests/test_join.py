@@ -0,0 +1,74 @@
+from conseil.core import ConseilClient
+from tests.mock_api import ConseilCase, MockDataApi
+
+
+class MultiEntityApi(MockDataApi):
+
+    def __init__(self, tables):
+        super(MultiEntityApi, self).__init__([])
+        self.tables = tables
+
+    def _post(self, path, json, **kwargs):
+        self.rows = self.tables[path.rsplit('/', 1)[-1]]
+        return super(MultiEntityApi, self)._post(path, json, **kwargs)
+
+
+class JoinTest(ConseilCase):
+
+    def setUp(self):
+        super(JoinTest, self).setUp()
+        self.api = MultiEntityApi({
+            'operations': [
+                {'operation_group_hash': f'op{i}', 'block_level': i // 3, 'kind': 'transaction'}
+                for i in range(30)
+            ],
+            'blocks': [
+                {'level': level, 'baker': f'tz{level % 4}', 'kind': 'block'}
+                for level in range(8)
+            ]
+        })
+        c = ConseilClient(self.api).tezos.alphanet
+        self.Operation, self.Block = c.operations, c.blocks
+
+    def test_inner_join(self):
+        Operation, Block = self.Operation, self.Block
+        res = list(Operation.query(Operation.operation_group_hash, Operation.kind)
+                   .order_by(Operation.block_level)
+                   .join(Block.query(Block.baker, Block.kind), on=(Operation.block_level, Block.level), batch_size=7))
+
+        self.assertEqual(24, len(res))
+        self.assertDictEqual({
+            'operation_group_hash': 'op5',
+            'kind': 'transaction',
+            'block_level': 1,
+            'baker': 'tz1',
+            'level': 1,
+            'blocks.kind': 'block'
+        }, next(x for x in res if x['operation_group_hash'] == 'op5'))
+
+        right_requests = [x[1]['json'] for x in self.api.post.call_args_list if x[1]['path'].endswith('blocks')]
+        self.assertTrue(all(len(x['predicates'][0]['set']) <= 3 for x in right_requests))
+
+    def test_left_join(self):
+        Operation, Block = self.Operation, self.Block
+        res = list(Operation.query()
+                   .join(Block.query().limit(1), on=(Operation.block_level, Block.level), how='left'))
+        self.assertEqual(30, len(res))
+        self.assertEqual(24, len([x for x in res if 'baker' in x]))
+
+    def test_labeled_keys(self):
+        Operation, Block = self.Operation, self.Block
+        left = Operation.query(Operation.block_level.label('lvl'), Operation.operation_group_hash)
+        right = Block.query(Block.level.label('block'), Block.baker)
+        res = list(left.join(right, on=(Operation.block_level, Block.level)))
+
+        self.assertEqual(24, len(res))
+        self.assertDictEqual(
+            {'lvl': 1, 'operation_group_hash': 'op5', 'block': 1, 'baker': 'tz1'},
+            next(x for x in res if x['operation_group_hash'] == 'op5')
+        )
+
+    def test_invalid(self):
+        Operation, Block = self.Operation, self.Block
+        self.assertRaises(NotImplementedError, Operation.query().join,
+                          Block.query(), on=(Operation.block_level, Block.level), how='outer')
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from conseil.core import ConseilClient
+from tests.mock_api import ConseilCase, MockDataApi
+
+
+class BatchLoaderTest(ConseilCase):
+
+    def setUp(self):
+        super(BatchLoaderTest, self).setUp()
+        rows = [{'account_id': f'tz{i}', 'balance': i, 'manager': f'tz{i // 2}'} for i in range(49)]
+        rows.append({'account_id': 'tz49', 'balance': 49, 'manager': 'tz100'})
+        self.api = MockDataApi(rows)
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+
+    def test_load_many(self):
+        Account = self.Account
+        with Account.query(Account.balance).loader(Account.account_id, batch_size=10) as loader:
+            res = loader.load_many([f'tz{i}' for i in range(25)] + ['unknown', 'tz3'])
+
+        self.assertListEqual([{'balance': i} for i in range(25)] + [None, {'balance': 3}], res)
+        self.assertEqual(3, self.api.post.call_count)
+        self.assertEqual('in', self.api.post.call_args_list[0][1]['json']['predicates'][0]['operation'])
+
+    def test_concurrent_callers(self):
+        Account = self.Account
+        loader = Account.query().loader(Account.account_id, batch_size=100, delay=0.05)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            res = list(executor.map(loader.get, [f'tz{i}' for i in range(10)]))
+        loader.close()
+
+        self.assertListEqual(list(range(10)), [x['balance'] for x in res])
+        self.assertEqual(1, self.api.post.call_count)
+
+    def test_multiple_rows(self):
+        Account = self.Account
+        with Account.query().loader(Account.manager) as loader:
+            self.assertIsNone(loader.get('tz1'))
+            self.assertIsNone(loader.get('tz200'))
+            self.assertEqual('tz49', loader.get('tz100')['account_id'])
+
+    def test_error(self):
+        Account = self.Account
+        self.api.post.side_effect = RuntimeError('down')
+        with Account.query().loader(Account.account_id) as loader:
+            future = loader.load('tz1')
+            self.assertRaises(RuntimeError, future.result)
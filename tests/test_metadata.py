@@ -1,5 +1,11 @@
+import gc
+import weakref
+from unittest import TestCase
+from unittest.mock import MagicMock
+
 from conseil.core import *
-from tests.mock_api import ConseilCase
+from conseil.metadata import MetadataCache
+from tests.mock_api import ConseilCase, MockResponse
 
 
 class MetadataTest(ConseilCase):
@@ -48,3 +54,36 @@ class MetadataTest(ConseilCase):
     def test_metadata_terminator(self):
         value = self.conseil.tezos.alphanet.operations.kind.transaction
         self.assertEqual('transaction', value)
+
+
+class MetadataCacheTest(TestCase):
+
+    def setUp(self):
+        self.api = MagicMock()
+        self.api.get.return_value = MockResponse()
+
+    def test_shared_between_clients(self):
+        cache = MetadataCache()
+        ConseilClient(self.api, metadata_cache=cache).tezos.alphanet()
+        ConseilClient(self.api, metadata_cache=cache).tezos.alphanet()
+        self.assertEqual(1, self.api.get.call_count)
+        self.assertDictEqual({'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'maxsize': 1024}, cache.stats())
+
+    def test_bounded(self):
+        cache = MetadataCache(maxsize=2)
+        conseil = ConseilClient(self.api, metadata_cache=cache)
+        for network in ['mainnet', 'babylonnet', 'alphanet']:
+            getattr(conseil.tezos, network)()
+        self.assertEqual(2, cache.stats()['size'])
+        self.assertEqual(1, cache.stats()['evictions'])
+
+        conseil.tezos.mainnet()
+        self.assertEqual(4, self.api.get.call_count)
+
+    def test_nodes_released(self):
+        conseil = ConseilClient(self.api)
+        ref = weakref.ref(conseil.tezos.alphanet.accounts.balance)
+        conseil.tezos.alphanet.accounts()
+        del conseil
+        gc.collect()
+        self.assertIsNone(ref())
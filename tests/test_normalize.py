@@ -0,0 +1,144 @@
+import random
+from decimal import Decimal
+from unittest import TestCase
+
+from conseil.aggregate import evaluate
+from conseil.cache import cache_key
+from conseil.normalize import normalize, normalize_predicates, payload_hash
+from tests.mock_api import ConseilCase
+
+FIELDS = {
+    'level': lambda rnd: rnd.randint(0, 20),
+    'fee': lambda rnd: Decimal(rnd.randint(0, 300)) / 100,
+    'kind': lambda rnd: rnd.choice(['a', 'ab', 'b', 'c']),
+}
+
+
+def match(row, predicate):
+    # SQL semantics: any comparison with NULL is false, inverted or not
+    value = row.get(predicate['field'])
+    if value is None and predicate['operation'] != 'isnull':
+        return False
+    return evaluate(predicate, value)
+
+
+def select(rows, predicates):
+    return [i for i, row in enumerate(rows) if all(match(row, p) for p in predicates)]
+
+
+def random_predicate(rnd):
+    field = rnd.choice(list(FIELDS))
+    value = lambda: FIELDS[field](rnd)
+    operation = rnd.choice(['eq', 'in', 'in', 'lt', 'gt', 'lt', 'gt', 'between', 'isnull', 'startsWith'])
+    if operation == 'in':
+        values = [value() for _ in range(rnd.randint(1, 4))]
+        values += rnd.sample(values, rnd.randint(0, len(values)))
+    elif operation == 'between':
+        values = sorted([value(), value()])
+    elif operation == 'isnull':
+        values = []
+    elif operation == 'startsWith':
+        field, values = 'kind', [rnd.choice(['a', 'b'])]
+    else:
+        values = [value()]
+    return {'field': field, 'operation': operation, 'set': values, 'inverse': rnd.random() < 0.3}
+
+
+def random_payload(rnd):
+    return {
+        'fields': rnd.sample(list(FIELDS), rnd.randint(0, 3)),
+        'predicates': [random_predicate(rnd) for _ in range(rnd.randint(0, 6))],
+        'aggregation': [],
+        'orderBy': [],
+        'limit': rnd.choice([None, 10]),
+        'output': 'json'
+    }
+
+
+def shuffled(payload, rnd):
+    predicates = []
+    for predicate in payload['predicates']:
+        predicate = dict(reversed(list(predicate.items())))
+        if predicate['operation'] == 'in':
+            predicate['set'] = rnd.sample(predicate['set'], len(predicate['set']))
+        predicates.append(predicate)
+    predicates += rnd.sample(predicates, rnd.randint(0, len(predicates)))
+    rnd.shuffle(predicates)
+    return {**payload, 'predicates': predicates}
+
+
+class NormalizeCorpusTest(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(42)
+        self.rows = [
+            {k: None if rnd.random() < 0.1 else v(rnd) for k, v in FIELDS.items()}
+            for _ in range(200)
+        ]
+
+    def test_corpus(self):
+        rnd = random.Random(1)
+        for _ in range(1000):
+            payload = random_payload(rnd)
+            normalized = normalize(payload)
+            self.assertListEqual(select(self.rows, payload['predicates']),
+                                 select(self.rows, normalized['predicates']), payload)
+            self.assertDictEqual(normalized, normalize(normalized))
+            self.assertLessEqual(len(normalized['predicates']), len(payload['predicates']))
+            self.assertEqual(payload_hash(payload), payload_hash(shuffled(payload, rnd)), payload)
+
+    def test_distinct_queries(self):
+        rnd = random.Random(2)
+        hashes = dict()
+        for _ in range(1000):
+            payload = random_payload(rnd)
+            key = payload_hash(payload)
+            if key in hashes:
+                other = hashes[key]
+                self.assertListEqual(select(self.rows, other['predicates']), select(self.rows, payload['predicates']))
+            hashes[key] = payload
+
+
+class NormalizeTest(ConseilCase):
+
+    def test_ranges(self):
+        p = lambda op, value, inverse=False: {'field': 'level', 'operation': op, 'set': [value], 'inverse': inverse}
+        self.assertListEqual(
+            [{'field': 'level', 'operation': 'between', 'set': [1, 5], 'inverse': False}],
+            normalize_predicates([p('lt', 1, True), p('gt', 5, True)])
+        )
+        self.assertListEqual([p('gt', 1), p('lt', 5)], normalize_predicates([p('lt', 5), p('gt', 1)]))
+        self.assertListEqual([p('gt', 3)], normalize_predicates([p('gt', 1), p('lt', 3, True), p('gt', 3)]))
+
+    def test_precision(self):
+        c = self.conseil.tezos.alphanet.accounts
+        query = c.query().filter(c.balance > Decimal('0.01'), c.balance < 5)
+        self.assertListEqual(query.payload()['predicates'], query.payload(normalized=True)['predicates'])
+
+        p = lambda op, value, precision: {
+            'field': 'balance', 'operation': op, 'set': [value], 'inverse': True, 'precision': precision
+        }
+        self.assertListEqual(
+            [{'field': 'balance', 'operation': 'between', 'set': [Decimal('0.1'), Decimal('0.5')],
+              'inverse': False, 'precision': 1}, p('lt', Decimal('0.01'), 2)],
+            normalize_predicates([p('lt', Decimal('0.1'), 1), p('gt', Decimal('0.5'), 1), p('lt', Decimal('0.01'), 2)])
+        )
+
+    def test_in(self):
+        predicates = normalize_predicates([
+            {'field': 'kind', 'operation': 'in', 'set': ['b', 'a', 'b'], 'inverse': False},
+            {'field': 'level', 'operation': 'in', 'set': [1, 1], 'inverse': True},
+            {'field': 'fee', 'operation': 'in', 'set': [1, True, 1.0], 'inverse': False},
+        ])
+        self.assertListEqual([[True, 1.0, 1], ['a', 'b'], [1]], [x['set'] for x in predicates])
+        self.assertListEqual([bool, float, int], list(map(type, predicates[0]['set'])))
+        self.assertEqual('eq', predicates[2]['operation'])
+
+    def test_query(self):
+        c = self.conseil.tezos.alphanet.accounts
+        value = Decimal('0.10')
+        first = c.query().filter(c.balance == value, c.account_id.startswith('tz'))
+        second = c.query().filter(c.account_id.startswith('tz')).filter_by(balance=value)
+        self.assertNotEqual(first.payload(), second.payload())
+        self.assertEqual(first.payload(normalized=True), second.payload(normalized=True))
+        self.assertEqual(cache_key('url', first.payload()), cache_key('url', second.payload()))
@@ -0,0 +1,55 @@
+from conseil.core import ConseilClient, ConseilException
+from tests.mock_api import ConseilCase, MockDataApi
+
+
+class PaginationTest(ConseilCase):
+
+    def setUp(self):
+        super(PaginationTest, self).setUp()
+        self.rows = [
+            {'level': level // 3, 'hash': f'op{level}', 'fee': level % 5}
+            for level in range(100)
+        ]
+        self.api = MockDataApi(self.rows)
+        self.Operation = ConseilClient(self.api).tezos.alphanet.operations
+
+    def test_iter_rows_asc(self):
+        query = self.Operation.query().order_by(self.Operation.level)
+        res = list(query.iter_rows(page_size=10))
+        self.assertEqual(100, len(res))
+        self.assertSetEqual({x['hash'] for x in self.rows}, {x['hash'] for x in res})
+        self.assertListEqual(sorted(x['level'] for x in res), [x['level'] for x in res])
+
+    def test_iter_rows_desc_filtered(self):
+        Operation = self.Operation
+        query = Operation.query().filter(Operation.fee > 0).order_by(Operation.level.desc())
+        res = list(query.iter_rows(page_size=7))
+        expected = [x for x in self.rows if x['fee'] > 0]
+        self.assertSetEqual({x['hash'] for x in expected}, {x['hash'] for x in res})
+        self.assertEqual(len(expected), len(res))
+        self.assertListEqual(sorted((x['level'] for x in res), reverse=True), [x['level'] for x in res])
+
+    def test_ties_larger_than_page(self):
+        query = self.Operation.query().order_by(self.Operation.level)
+        res = list(query.iter_rows(page_size=2))
+        self.assertEqual(100, len(res))
+        self.assertEqual(100, len({x['hash'] for x in res}))
+
+    def test_limit(self):
+        query = self.Operation.query().order_by(self.Operation.level).limit(25)
+        pages = list(query.iter_pages(page_size=10))
+        self.assertEqual(25, sum(map(len, pages)))
+        self.assertTrue(all(len(x) <= 10 for x in pages))
+
+    def test_key_not_selected(self):
+        Operation = self.Operation
+        query = Operation.query(Operation.hash.label('id')).order_by(Operation.level)
+        res = list(query.iter_rows(page_size=10))
+        self.assertEqual(100, len(res))
+        self.assertDictEqual({'id': 'op0'}, res[0])
+
+    def test_errors(self):
+        Operation = self.Operation
+        self.assertRaises(ConseilException, list, Operation.query().iter_rows())
+        query = Operation.query(Operation.level, Operation.fee.sum()).order_by(Operation.fee.sum())
+        self.assertRaises(ConseilException, list, query.iter_rows())
@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+from conseil.core import ConseilClient, ConseilException
+from conseil.parallel import merge_sorted
+from tests.mock_api import ConseilCase, MockDataApi
+
+
+class PartitionTest(ConseilCase):
+
+    def setUp(self):
+        super(PartitionTest, self).setUp()
+        self.rows = [
+            {'level': level, 'kind': ['transaction', 'origination'][level % 2], 'fee': (level * 7) % 11}
+            for level in range(100)
+        ]
+        self.api = MockDataApi(self.rows)
+        self.Operation = ConseilClient(self.api).tezos.alphanet.operations
+
+    def test_integer_ranges(self):
+        Operation = self.Operation
+        query = Operation.query().partition(Operation.level, 10, 29, 3)
+        ranges = [x['predicates'][0]['set'] for x in query.payloads()]
+        self.assertListEqual([[10, 15], [16, 22], [23, 29]], ranges)
+
+        query = Operation.query().partition(Operation.level, 0, 1, 5)
+        self.assertEqual(2, len(query.parts))
+
+    def test_decimal_ranges(self):
+        Operation = self.Operation
+        query = Operation.query().partition(Operation.fee, Decimal('0'), Decimal('1'), 2)
+        predicates = [x['predicates'] for x in query.payloads()]
+        self.assertEqual(['lt', 'lt'], [x['operation'] for x in predicates[0]])
+        # Bounds of different precision are not joined
+        self.assertEqual(['gt', 'lt'], [x['operation'] for x in predicates[1]])
+        self.assertEqual([True, True], [x['inverse'] for x in predicates[1]])
+
+    def test_merge_order(self):
+        Operation = self.Operation
+        query = Operation.query(Operation.level, Operation.fee.label('f')) \
+            .filter(Operation.kind == 'transaction') \
+            .order_by(Operation.fee.desc(), Operation.level) \
+            .limit(15)
+        expected = query.all()
+        res = query.partition(Operation.level, 0, 99, 4).all()
+        self.assertListEqual(expected, res)
+        self.assertEqual(1 + 4, self.api.post.call_count)
+
+    def test_merge_unselected_order(self):
+        Operation = self.Operation
+        query = Operation.query(Operation.level).order_by(Operation.fee.desc(), Operation.level).limit(5)
+        expected = query.all()
+        self.api.post.reset_mock()
+
+        self.assertListEqual(expected, query.partition(Operation.level, 0, 99, 4).all())
+        self.assertTrue(all(x[1]['json']['fields'] == ['level', 'fee'] for x in self.api.post.call_args_list))
+
+    def test_merge_sorted_nulls(self):
+        results = [[{'a': 1}, {'a': None}], [{'a': 0}, {'a': 2}]]
+        res = merge_sorted(results, [{'field': 'a', 'direction': 'asc'}])
+        self.assertListEqual([0, 1, 2, None], [x['a'] for x in res])
+
+    def test_invalid(self):
+        Operation = self.Operation
+        self.assertRaises(ConseilException, Operation.query().partition, Operation.level, 10, 0, 2)
+        self.assertRaises(ConseilException, Operation.query().partition, Operation.level, 0, 10, 0)
+
+
+class AggregatedPartitionTest(ConseilCase):
+
+    def setUp(self):
+        super(AggregatedPartitionTest, self).setUp()
+        self.rows = [
+            {'level': level, 'baker': f'tz{level % 7}', 'kind': ['transaction', 'origination'][level % 2],
+             'fee': (level * 13) % 17}
+            for level in range(200)
+        ]
+        self.api = MockDataApi(self.rows)
+        self.Operation = ConseilClient(self.api).tezos.alphanet.operations
+
+    def assertPartitionedEqual(self, query, parts=5):
+        expected = query.all()
+        res = query.partition(self.Operation.level, 0, 199, parts).all()
+        self.assertEqual(len(expected), len(res))
+        for x, y in zip(expected, res):
+            self.assertEqual(x.keys(), y.keys())
+            for key in x:
+                if isinstance(x[key], float):
+                    self.assertAlmostEqual(x[key], y[key])
+                else:
+                    self.assertEqual(x[key], y[key])
+
+    def test_merge_functions(self):
+        Operation = self.Operation
+        self.assertPartitionedEqual(
+            Operation.query(Operation.baker, Operation.kind, Operation.fee.sum(), Operation.fee.count(),
+                            Operation.fee.min(), Operation.fee.max(), Operation.fee.avg())
+            .order_by(Operation.baker, Operation.kind)
+        )
+
+    def test_having_order_limit(self):
+        Operation = self.Operation
+        self.assertPartitionedEqual(
+            Operation.query(Operation.baker, Operation.fee.avg().label('avg_fee'))
+            .having(Operation.fee.avg() > 7)
+            .order_by(Operation.fee.avg().desc())
+            .limit(3)
+        )
+
+    def test_group_by(self):
+        Operation = self.Operation
+        self.assertPartitionedEqual(
+            Operation.query(Operation.level.count())
+            .group_by(Operation.kind)
+            .order_by(Operation.level.count())
+        )
+
+    def test_across_networks(self):
+        Operation = self.Operation
+        query = Operation.query(Operation.kind, Operation.fee.sum()).across('mainnet', 'babylonnet')
+        paths = [x.path for x in query.parts]
+        self.assertListEqual(['data/tezos/mainnet/operations', 'data/tezos/babylonnet/operations'], paths)
+
+        expected = {x['kind']: 2 * x['sum_fee'] for x in Operation.query(Operation.kind, Operation.fee.sum()).all()}
+        self.assertDictEqual(expected, {x['kind']: x['sum_fee'] for x in query.all()})
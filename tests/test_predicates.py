@@ -191,6 +191,17 @@ class PredicatesTest(ConseilCase):
 
         self.assertEqual(2, len(query.payload()['predicates']))
 
+    def test_chained_filter(self):
+        c = self.conseil.tezos.alphanet.operations
+
+        query = c.query().filter(c.kind == c.kind.transaction)
+        first = query.filter(c.fee > 0)
+        second = query.filter_by(source='tz1')
+
+        self.assertEqual(1, len(query.payload()['predicates']))
+        self.assertEqual(['eq', 'gt'], [x['operation'] for x in first.payload()['predicates']])
+        self.assertEqual(['eq', 'eq'], [x['operation'] for x in second.payload()['predicates']])
+
     def test_filter_by(self):
         c = self.conseil.tezos.alphanet.accounts
 
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from conseil.cache import MemoryCache
+from conseil.core import ConseilClient
+from conseil.query import projection, row_factory
+from conseil.singleflight import SingleFlight
+from tests.mock_api import MockDataApi
+
+
+class RecordsTest(TestCase):
+
+    def setUp(self):
+        rows = [{'account_id': f'tz{i}', 'balance': i, 'counter': i % 2} for i in range(5)]
+        self.api = MockDataApi(rows)
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+
+    def test_tuple(self):
+        Account = self.Account
+        res = Account.query(Account.account_id, Account.balance).all(output='tuple')
+        self.assertListEqual([(f'tz{i}', i) for i in range(5)], res)
+        self.assertEqual('json', self.api.post.call_args[1]['json']['output'])
+
+    def test_record(self):
+        Account = self.Account
+        res = Account.query(Account.account_id.label('address'), Account.balance).all(output='record')
+        self.assertEqual(('address', 'balance'), res[0]._fields)
+        self.assertEqual('tz1', res[1].address)
+        self.assertIs(type(res[0]), type(res[4]))
+
+    def test_dropped_columns(self):
+        Account = self.Account
+        res = Account.query(Account.balance.sum()).group_by(Account.counter).all(output='record')
+        self.assertEqual(('sum_balance',), res[0]._fields)
+        self.assertListEqual([4, 6], sorted(x.sum_balance for x in res))
+
+    def test_stream(self):
+        rows = self.Account.query().all(output='tuple', stream=True)
+        self.assertEqual(('tz0', 0, 0), next(rows))
+        self.assertEqual(4, len(list(rows)))
+
+    def test_cache_and_single_flight(self):
+        cache = MemoryCache()
+        query = self.Account.query(self.Account.account_id).cached(cache).single_flight()
+        self.assertListEqual(query.all(output='tuple'), query.all(output='tuple'))
+        self.assertEqual(1, self.api.post.call_count)
+        self.assertEqual(1, cache.stats()['hits'])
+
+        group = SingleFlight()
+        self.Account.query().single_flight(group).all(output='record')
+        self.assertEqual(1, group.stats()['calls'])
+
+    def test_invalid_names(self):
+        make = row_factory(['a', 'b'], ['operations.kind', 'b'], 'record')
+        self.assertEqual(('_0', 'b'), make({'a': 1, 'b': 2})._fields)
+        self.assertEqual((), row_factory([], [], 'tuple')({'a': 1}))
+
+
+class ProjectionTest(TestCase):
+
+    def test_projection(self):
+        project = projection(['a', 'b', 'c'], {'a': 'x', 'b': False})
+        self.assertDictEqual({'x': 1, 'c': 3}, project({'a': 1, 'b': 2, 'c': 3}))
+        self.assertDictEqual({'x': 1, 'd': 4}, project({'a': 1, 'b': 2, 'd': 4}))
+        self.assertDictEqual({'x': 1}, project({'a': 1}))
+        self.assertDictEqual({'a': 1}, projection(['a', 'b'], {'b': False})({'a': 1, 'b': 2}))
+        self.assertDictEqual({}, projection(['a'], {'a': False})({'a': 1}))
+
+    def test_quoted_names(self):
+        project = projection(["it's", 'b'], {"it's": 'x"y'})
+        self.assertDictEqual({'x"y': 1, 'b': 2}, project({"it's": 1, 'b': 2}))
@@ -0,0 +1,110 @@
+import time
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from conseil.api import ConseilApi, ConseilException
+from conseil.retry import RateLimiter, RetryPolicy
+
+
+def response(status_code, headers=None):
+    return MagicMock(status_code=status_code, headers=headers or dict(), text='')
+
+
+class RetryTest(TestCase):
+
+    def setUp(self):
+        self.transport = MagicMock()
+        self.retry = RetryPolicy(retries=3, backoff=1, max_backoff=3, jitter=False)
+        self.api = ConseilApi('key', 'http://localhost', 2, transport=self.transport, retry=self.retry)
+
+    @patch('conseil.api.time.sleep')
+    def test_backoff(self, sleep):
+        self.transport.request.side_effect = [response(503), response(502), response(200)]
+        self.assertEqual(200, self.api.post('data/tezos/mainnet/blocks', {}).status_code)
+        self.assertListEqual([1, 2], [x[0][0] for x in sleep.call_args_list])
+
+    @patch('conseil.api.time.sleep')
+    def test_max_retries(self, sleep):
+        self.transport.request.return_value = response(503)
+        self.assertRaises(ConseilException, self.api.get, 'metadata/platforms')
+        self.assertEqual(4, self.transport.request.call_count)
+        self.assertListEqual([1, 2, 3], [x[0][0] for x in sleep.call_args_list])
+
+    @patch('conseil.api.time.sleep')
+    def test_not_retried(self, sleep):
+        self.transport.request.return_value = response(500)
+        self.assertRaises(ConseilException, self.api.get, 'metadata/platforms')
+        self.assertEqual(1, self.transport.request.call_count)
+
+    @patch('conseil.api.time.sleep')
+    def test_timeout(self, sleep):
+        self.transport.request.side_effect = [requests.Timeout(), response(200)]
+        self.assertEqual(200, self.api.get('metadata/platforms').status_code)
+
+        self.transport.request.side_effect = ValueError()
+        self.assertRaises(ValueError, self.api.get, 'metadata/platforms')
+
+    @patch('conseil.api.time.sleep')
+    def test_retry_after(self, sleep):
+        limiter = MagicMock()
+        retry = RetryPolicy(retries=3, backoff=1, max_backoff=3, jitter=False, max_retry_after=10)
+        api = ConseilApi('key', 'http://localhost', 2, transport=self.transport, retry=retry, rate_limiter=limiter)
+        self.transport.request.side_effect = [response(429, {'Retry-After': '7'}), response(200)]
+        api.get('metadata/platforms')
+        sleep.assert_called_once_with(7.0)
+        limiter.pause.assert_called_once_with(7.0)
+        self.assertEqual(2, limiter.acquire.call_count)
+
+    @patch('conseil.api.time.sleep')
+    def test_retry_after_too_long(self, sleep):
+        limiter = MagicMock()
+        api = ConseilApi('key', 'http://localhost', 2, transport=self.transport, retry=self.retry,
+                         rate_limiter=limiter)
+        self.transport.request.side_effect = [response(429, {'Retry-After': '86400'}), response(200)]
+        with self.assertRaises(ConseilException) as ctx:
+            api.get('metadata/platforms')
+        self.assertEqual(429, ctx.exception.status_code)
+        self.assertFalse(sleep.called)
+        self.assertFalse(limiter.pause.called)
+        self.assertEqual(3, self.retry.delay(0, response(503, {'Retry-After': '86400'})))
+
+    def test_retry_after_date(self):
+        self.assertEqual(0, RetryPolicy.retry_after(response(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})))
+        self.assertIsNone(RetryPolicy.retry_after(response(429, {'Retry-After': 'soon'})))
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff=1, max_backoff=10)
+        delays = [policy.delay(10) for _ in range(100)]
+        self.assertTrue(all(0 <= x <= 10 for x in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+
+class RateLimiterTest(TestCase):
+
+    def test_rate(self):
+        clock = [100.0]
+        sleeps = []
+        with patch('conseil.retry.time.monotonic', side_effect=lambda: clock[0]), \
+                patch('conseil.retry.time.sleep', side_effect=sleeps.append):
+            limiter = RateLimiter(rate=10, burst=2)
+            for _ in range(4):
+                limiter.acquire()
+            self.assertListEqual([0.1, 0.2], [round(x, 6) for x in sleeps])
+
+            clock[0] += 10
+            limiter.pause(5)
+            limiter.acquire()
+            self.assertAlmostEqual(5, sleeps[-1])
+
+    def test_threads(self):
+        limiter = RateLimiter(rate=200, burst=5)
+        threads = [Thread(target=limiter.acquire) for _ in range(20)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 15 / 200 * 0.9)
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from unittest import TestCase
+
+from conseil.core import ConseilClient
+from conseil.singleflight import SingleFlight
+from tests.mock_api import MockDataApi
+
+
+class SingleFlightTest(TestCase):
+
+    def test_do(self):
+        group = SingleFlight()
+        barrier = Barrier(4)
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return [1]
+
+        def call(_):
+            barrier.wait()
+            return group.do('key', slow)
+
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(call, range(4)))
+
+        self.assertEqual(1, len(calls))
+        self.assertListEqual([False, True, True, True], sorted(x[1] for x in results))
+        self.assertDictEqual({'calls': 1, 'shared': 3}, group.stats())
+        self.assertEqual([1], group.do('key', lambda: [1])[0])
+        self.assertEqual(2, group.calls)
+
+    def test_exception(self):
+        group = SingleFlight()
+        self.assertRaises(ZeroDivisionError, group.do, 'key', lambda: 1 / 0)
+        self.assertEqual(2, group.do('key', lambda: 2)[0])
+
+
+class QuerySingleFlightTest(TestCase):
+
+    def setUp(self):
+        self.api = MockDataApi([{'account_id': f'tz{i}', 'balance': i} for i in range(100)])
+        post = self.api.post.side_effect
+        self.api.post.side_effect = lambda *args, **kwargs: time.sleep(0.1) or post(*args, **kwargs)
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+
+    def run_concurrently(self, queries):
+        barrier = Barrier(len(queries))
+
+        def call(query):
+            barrier.wait()
+            return query.all()
+
+        with ThreadPoolExecutor(len(queries)) as executor:
+            return list(executor.map(call, queries))
+
+    def test_shared(self):
+        Account = self.Account
+        group = SingleFlight()
+        query = Account.query(Account.account_id.label('address'), Account.balance) \
+            .order_by(Account.balance.desc()) \
+            .limit(50) \
+            .single_flight(group)
+        results = self.run_concurrently([query] * 8)
+
+        self.assertEqual(1, self.api.post.call_count)
+        self.assertTrue(all(x == results[0] for x in results))
+        self.assertEqual('tz99', results[0][0]['address'])
+        self.assertIsNot(results[0], results[1])
+
+    def test_different_queries(self):
+        group = SingleFlight()
+        queries = [self.Account.query().limit(i).single_flight(group) for i in range(4)]
+        self.run_concurrently(queries)
+        self.assertEqual(4, self.api.post.call_count)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from conseil.core import ConseilClient, ConseilException
+from conseil.metadata import MetadataSnapshot
+
+METADATA = {
+    'metadata/platforms': [{'name': 'tezos'}],
+    'metadata/tezos/networks': [{'name': 'mainnet'}, {'name': 'babylonnet'}],
+    'metadata/tezos/mainnet/entities': [{'name': 'accounts'}, {'name': 'blocks'}],
+    'metadata/tezos/babylonnet/entities': [{'name': 'accounts'}],
+    'metadata/tezos/mainnet/accounts/attributes': [{'name': 'account_id', 'dataType': 'String'}],
+    'metadata/tezos/mainnet/blocks/attributes': [{'name': 'level', 'dataType': 'Int'}],
+    'metadata/tezos/babylonnet/accounts/attributes': [{'name': 'balance', 'dataType': 'Decimal'}],
+}
+
+
+def metadata_api():
+    api = MagicMock()
+    api.get.side_effect = lambda path: MagicMock(json=MagicMock(return_value=METADATA.get(path, [])))
+    return api
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'metadata.json.gz')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_export(self):
+        snapshot = ConseilClient(metadata_api()).export_snapshot(networks=['mainnet'])
+        self.assertListEqual([
+            'metadata/platforms',
+            'metadata/tezos/networks',
+            'metadata/tezos/mainnet/entities',
+            'metadata/tezos/mainnet/accounts/attributes',
+            'metadata/tezos/mainnet/blocks/attributes'
+        ], snapshot.paths())
+
+    def test_offline_navigation(self):
+        ConseilClient(metadata_api()).export_snapshot(self.filename)
+
+        api = MagicMock()
+        conseil = ConseilClient(api, snapshot=self.filename)
+        self.assertIn('babylonnet', dir(conseil.tezos))
+        self.assertIn('blocks', dir(conseil.tezos.mainnet))
+        self.assertIn('level', dir(conseil.tezos.mainnet.blocks))
+        self.assertListEqual(METADATA['metadata/tezos/babylonnet/accounts/attributes'],
+                             conseil.tezos.babylonnet.accounts())
+        api.get.assert_not_called()
+
+    def test_refresh(self):
+        api = metadata_api()
+        conseil = ConseilClient(api, snapshot=MetadataSnapshot({'metadata/platforms': []}))
+        self.assertListEqual([], conseil())
+
+        conseil.refresh(background=True).join()
+        self.assertListEqual([{'name': 'tezos'}], conseil())
+        self.assertRaises(ConseilException, ConseilClient(api).refresh)
+
+    def test_version(self):
+        snapshot = MetadataSnapshot({'metadata/platforms': []})
+        snapshot.__format_version__ = 0
+        snapshot.save(self.filename)
+        self.assertRaises(ConseilException, MetadataSnapshot.load, self.filename)
+
+
+class PrefetchTest(TestCase):
+
+    def test_prefetch(self):
+        api = metadata_api()
+        conseil = ConseilClient(api)
+        snapshot = conseil.prefetch(networks=['babylonnet'], depth=2)
+        self.assertListEqual([
+            'metadata/platforms',
+            'metadata/tezos/networks',
+            'metadata/tezos/babylonnet/entities'
+        ], snapshot.paths())
+
+        calls = api.get.call_count
+        self.assertIn('accounts', dir(conseil.tezos.babylonnet))
+        self.assertEqual(calls, api.get.call_count)
+
+    def test_prefetch_attributes(self):
+        api = metadata_api()
+        conseil = ConseilClient(api)
+        conseil.prefetch()
+        self.assertEqual(len(METADATA), api.get.call_count)
+
+        self.assertIn('balance', dir(conseil.tezos.babylonnet.accounts))
+        self.assertEqual(len(METADATA), api.get.call_count)
@@ -0,0 +1,101 @@
+import io
+import json
+from types import GeneratorType
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from conseil.core import ConseilClient, ConseilException
+from conseil.stream import iter_json_array, iter_csv, rewrite_csv, slice_json_array
+from tests.mock_api import MockDataApi
+
+
+class StreamDecodeTest(TestCase):
+
+    def test_chunked_array(self):
+        data = [{'a': i, 'b': 'é' * i, 'c': [1.5, None, True]} for i in range(20)] + [10 ** 20, 1.5e10, 'x']
+        raw = json.dumps(data, ensure_ascii=False).encode()
+        for size in [1, 2, 5, 1024]:
+            chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+            self.assertListEqual(data, list(iter_json_array(chunks)))
+
+    def test_empty_array(self):
+        self.assertListEqual([], list(iter_json_array([b' [', b' ] '])))
+
+    def test_malformed(self):
+        self.assertRaises(json.JSONDecodeError, list, iter_json_array([b'[1, 2']))
+        self.assertRaises(json.JSONDecodeError, list, iter_json_array([b'[1 2]']))
+        self.assertRaises(json.JSONDecodeError, list, iter_json_array([b'{}']))
+
+    def test_slice_json_array(self):
+        text = ' [ {"a": "]", "b": [1, 2]} , 1.10 ,"x" ] '
+        self.assertTupleEqual((' []', 0), slice_json_array(text, 0))
+        self.assertTupleEqual((' [ {"a": "]", "b": [1, 2]} , 1.10]', 2), slice_json_array(text, 2))
+        self.assertTupleEqual((' [ {"a": "]", "b": [1, 2]} , 1.10 ,"x"]', 3), slice_json_array(text))
+        self.assertTupleEqual(('[]', 0), slice_json_array('[ ]', 5))
+        self.assertRaises(json.JSONDecodeError, slice_json_array, '[1 2]')
+        self.assertRaises(json.JSONDecodeError, slice_json_array, '{}')
+
+    def test_iter_csv(self):
+        lines = list(iter_csv([{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}]))
+        self.assertListEqual(['a,b\r\n1,x\r\n', '2,y\r\n'], lines)
+        self.assertListEqual([], list(iter_csv([])))
+
+
+class StreamQueryTest(TestCase):
+
+    def setUp(self):
+        self.api = MockDataApi([{'account_id': f'tz{i}', 'balance': i} for i in range(10)])
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+
+    def test_all_stream(self):
+        res = self.Account.query().all(stream=True)
+        self.assertIsInstance(res, GeneratorType)
+        self.assertListEqual(self.api.rows, list(res))
+        self.assertTrue(self.api.post.call_args[1]['stream'])
+
+    def test_all_stream_postprocess(self):
+        Account = self.Account
+        res = Account.query(Account.account_id.label('address')).all(output='csv', stream=True)
+        self.assertEqual('address\r\n' + ''.join(f'tz{i}\r\n' for i in range(10)), ''.join(res))
+
+    def test_vector_stream(self):
+        res = self.Account.balance.query().vector(stream=True)
+        self.assertListEqual(list(range(10)), list(res))
+        self.assertRaises(ConseilException, list, self.Account.query().vector(stream=True))
+
+
+class CsvExportTest(TestCase):
+
+    def setUp(self):
+        self.api = MockDataApi([{'account_id': f'tz{i}', 'balance': i, 'manager': 'a,b'} for i in range(10)])
+        self.Account = ConseilClient(self.api).tezos.alphanet.accounts
+
+    def test_plain(self):
+        fp = io.StringIO()
+        count = self.Account.query().to_csv(fp)
+        self.assertEqual(self.Account.query().all(output='csv'), fp.getvalue())
+        self.assertEqual(len(fp.getvalue()), count)
+        self.assertEqual('csv', self.api.post.call_args[1]['json']['output'])
+
+    def test_rewrite(self):
+        Account = self.Account
+        query = Account.query(Account.account_id.label('address'), Account.manager) \
+            .group_by(Account.balance)
+        fp = io.BytesIO()
+        query.to_csv(fp)
+
+        self.assertEqual(query.all(output='csv'), fp.getvalue().decode())
+        self.assertEqual('csv', self.api.post.call_args_list[0][1]['json']['output'])
+        self.assertTrue(fp.getvalue().startswith(b'address,manager\r\ntz0,"a,b"\r\n'))
+
+    def test_socket(self):
+        sock = MagicMock()
+        self.Account.balance.query().to_csv(sock)
+        data = b''.join(x[0][0] for x in sock.sendall.call_args_list)
+        self.assertTrue(data.startswith(b'balance\r\n0\r\n1\r\n'))
+
+    def test_rewrite_csv(self):
+        text = 'a,b,c\r\n1,"x\r\ny",3\r\n4,5,6\r\n'
+        for size in [1, 2, 100]:
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual('A,c\r\n1,3\r\n4,6\r\n', ''.join(rewrite_csv(chunks, {'a': 'A', 'b': False})))
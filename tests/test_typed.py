@@ -0,0 +1,74 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import TestCase
+
+from conseil.cache import DiskCache
+from conseil.core import ConseilClient
+from conseil.metadata import MetadataCache
+from tests.mock_api import MockDataApi
+
+ATTRIBUTES = [
+    {'name': 'level', 'dataType': 'Int'},
+    {'name': 'timestamp', 'dataType': 'DateTime'},
+    {'name': 'balance', 'dataType': 'Decimal'},
+    {'name': 'kind', 'dataType': 'String'},
+]
+
+
+class TypedTest(TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {'level': 1, 'timestamp': 1554076800000, 'balance': Decimal('12345678901234567890.123'), 'kind': 'a'},
+            {'level': 2, 'timestamp': 1554076860001, 'balance': Decimal('0.1'), 'kind': 'b'},
+            {'level': 3, 'timestamp': None, 'balance': None, 'kind': None},
+        ]
+        self.api = MockDataApi(self.rows, metadata={'metadata/tezos/alphanet/operations/attributes': ATTRIBUTES})
+        self.Operation = ConseilClient(self.api, metadata_cache=MetadataCache()).tezos.alphanet.operations
+
+    def test_all(self):
+        res = self.Operation.query().typed().all()
+        self.assertEqual(datetime(2019, 4, 1, tzinfo=timezone.utc), res[0]['timestamp'])
+        self.assertEqual(datetime(2019, 4, 1, 0, 1, 0, 1000, tzinfo=timezone.utc), res[1]['timestamp'])
+        self.assertEqual(Decimal('12345678901234567890.123'), res[0]['balance'])
+        self.assertIsNone(res[2]['timestamp'])
+        self.assertEqual('a', res[0]['kind'])
+
+    def test_untyped(self):
+        res = self.Operation.query().all()
+        self.assertEqual(1554076800000, res[0]['timestamp'])
+        self.assertIsInstance(res[0]['balance'], float)
+
+    def test_stream_and_labels(self):
+        Operation = self.Operation
+        query = Operation.query(Operation.timestamp.label('ts'), Operation.balance).typed()
+        self.assertListEqual(query.all(), list(query.all(stream=True)))
+        self.assertEqual(Decimal('0.1'), query.all()[1]['balance'])
+        self.assertIsInstance(query.all()[0]['ts'], datetime)
+
+    def test_aggregation(self):
+        Operation = self.Operation
+        res = Operation.query(Operation.kind, Operation.level.count()).typed().all()
+        self.assertTrue(all(isinstance(x['count_level'], int) for x in res))
+
+    def test_decimal_predicate(self):
+        Operation = self.Operation
+        value = Decimal('12345678901234567890.123')
+        res = Operation.query(Operation.level).filter(Operation.balance == value).all()
+        self.assertListEqual([{'level': 1}], res)
+
+    def test_metadata_requested_once(self):
+        query = self.Operation.query().typed()
+        query.all()
+        query.all()
+        self.assertEqual(1, self.api.get.call_count)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(os.path.join(tmp, 'cache.db'))
+            query = self.Operation.query().cached(cache)
+            self.assertEqual(1554076800000, query.all()[0]['timestamp'])
+            self.assertEqual(Decimal('12345678901234567890.123'), query.typed().all()[0]['balance'])
+            self.assertEqual(1, self.api.post.call_count)